@@ -1,48 +1,241 @@
-import json
+#!/usr/bin/env python3
+"""
+Exam Routine Schema Migration
+
+Applies field renames and defaults to exam routine JSON files:
+- Renames keys (e.g. "Dept.." -> "Dept.") with --rename, or every alias
+  listed under "sourceFields" in departments.json with --schema
+- Adds missing fields with default values (Syllabus and Notes by default)
+- Streams each file once: entries are read one at a time and written to a
+  temporary file that atomically replaces the original, only if an entry
+  changed; indented files stay indented and compact files compact
+- Prints one summary line per file instead of one line per entry
+- --dry-run reports the counts without writing anything
+
+Usage:
+    python add_missing_fields.py
+    python add_missing_fields.py media/*.json --schema --dry-run
+    python add_missing_fields.py media/Data/*.json --rename Dept..=Dept. --default Notes=
+"""
+
+import argparse
+import glob
+import sys
+from collections import Counter
+
+from department_schema import (DEFAULT_SCHEMA_FILE, SchemaError, alias_map, load_schema,
+                               merge_source_fields)
+from json_backend import JSONDecodeError
+from json_stream import JsonArrayWriter, NotAJSONArray, atomic_write, iter_json_array
+
+DEFAULT_FILES = ["media/cse_processed_exam_routine.json"]
+
+# Fields added when no --default is given
+DEFAULT_FIELDS = {"Syllabus": "", "Notes": ""}
+
+
+class Migration:
+    """
+    A set of key renames and field defaults applied to every entry
+
+    renames maps old keys to new ones; a renamed key keeps its position and
+    when an entry already has the new key, the first of the two wins, as in
+    department_schema.normalize_keys(). defaults maps keys to the value
+    added when an entry lacks them. counts tallies every change made.
+    """
+
+    def __init__(self, renames=None, defaults=None):
+        self.renames = {old: new for old, new in (renames or {}).items() if old != new}
+        self.defaults = dict(defaults or {})
+        self.counts = Counter()
+
+    def apply(self, entry):
+        """
+        Return (entry, changed); unchanged entries are returned as they are
+        """
+        if not isinstance(entry, dict):
+            return entry, False
+
+        changed = False
+        if self.renames and not self.renames.keys().isdisjoint(entry):
+            migrated = {}
+            for key, value in entry.items():
+                new_key = self.renames.get(key, key)
+                if new_key != key:
+                    self.counts[f"renamed {key} -> {new_key}"] += 1
+                if new_key not in migrated:
+                    migrated[new_key] = value
+            entry = migrated
+            changed = True
+
+        for key, value in self.defaults.items():
+            if key not in entry:
+                entry[key] = value
+                self.counts[f"added {key}"] += 1
+                changed = True
+
+        return entry, changed
+
+
+def is_indented(file_path):
+    """
+    True when a JSON file is laid out with newlines rather than compact
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(64).lstrip()
+    return head[1:2] in (b"\n", b"\r")
+
+
+def migrate_file(file_path, migration, dry_run=False):
+    """
+    Apply a migration to one JSON array file in a single streaming pass
+
+    The file is replaced atomically, and only when at least one entry
+    changed. Returns (entries, changed entries); raises NotAJSONArray or
+    JSONDecodeError for files that cannot be migrated, leaving them as they
+    were.
+    """
+    total = 0
+    changed = 0
+
+    if dry_run:
+        for entry in iter_json_array(file_path):
+            total += 1
+            changed += migration.apply(entry)[1]
+        return total, changed
+
+    output = atomic_write(file_path, 'wb')
+    with output as f:
+        with JsonArrayWriter(f, is_indented(file_path)) as writer:
+            for entry in iter_json_array(file_path):
+                entry, entry_changed = migration.apply(entry)
+                total += 1
+                changed += entry_changed
+                writer.write(entry)
+        if not changed:
+            output.cancel()
+
+    return total, changed
+
+
+def migrate_files(file_paths, migration, dry_run=False):
+    """
+    Migrate every file and print one summary line each, then the totals
+
+    Returns the number of files that could not be migrated.
+    """
+    failed = 0
+    changed_files = 0
+    totals = Counter()
+
+    for file_path in file_paths:
+        before = migration.counts.copy()
+        try:
+            total, changed = migrate_file(file_path, migration, dry_run)
+        except NotAJSONArray:
+            print(f"   ⚠️  {file_path}: not a list, skipped")
+            continue
+        except (OSError, JSONDecodeError) as e:
+            print(f"   ❌ {file_path}: {e} (left unchanged)")
+            failed += 1
+            continue
+
+        totals["entries"] += total
+        totals["changed"] += changed
+        if not changed:
+            print(f"   ✅ {file_path}: {total} entries, nothing to change")
+            continue
+
+        changed_files += 1
+        details = ", ".join(f"{change}: {count}"
+                            for change, count in (migration.counts - before).items())
+        verb = "would change" if dry_run else "changed"
+        print(f"   ✏️  {file_path}: {changed} of {total} entries {verb} ({details})")
+
+    print(f"\n{'🔍 Dry run: ' if dry_run else '✅ '}{totals['changed']} of {totals['entries']} entries "
+          f"in {changed_files} of {len(file_paths)} files {'would change' if dry_run else 'updated'}")
+    for change, count in sorted(migration.counts.items()):
+        print(f"   • {change}: {count}")
+
+    return failed
+
 
 def add_missing_fields(json_file_path):
     """
     Add 'Syllabus' and 'Notes' fields to entries that are missing them
     """
-    print(f"Processing {json_file_path}...")
-    
-    # Read the JSON file
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    
-    modified_count = 0
-    total_entries = len(data)
-    
-    # Check each entry
-    for i, entry in enumerate(data):
-        modified = False
-        
-        # Add Syllabus field if missing
-        if 'Syllabus' not in entry:
-            entry['Syllabus'] = ""
-            modified = True
-            print(f"Added Syllabus field to entry {i+1}")
-        
-        # Add Notes field if missing
-        if 'Notes' not in entry:
-            entry['Notes'] = ""
-            modified = True
-            print(f"Added Notes field to entry {i+1}")
-        
-        if modified:
-            modified_count += 1
-    
-    # Save the updated file if any modifications were made
-    if modified_count > 0:
-        with open(json_file_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=2, ensure_ascii=False)
-        print(f"\n✅ Updated {modified_count} entries out of {total_entries} total entries")
-        print(f"✅ File saved: {json_file_path}")
-    else:
-        print(f"\n✅ All {total_entries} entries already have Syllabus and Notes fields")
-        print("No modifications needed")
+    return migrate_files([json_file_path], Migration(defaults=DEFAULT_FIELDS)) == 0
+
+
+def parse_assignment(text):
+    """
+    Split a KEY=VALUE command line argument
+    """
+    key, sep, value = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    return key, value
+
+
+def schema_renames(schema_file):
+    """
+    Return {alias: canonical key} for the shared sourceFields in the schema file
+    """
+    return alias_map(merge_source_fields(load_schema(schema_file).get("sourceFields")))
+
+
+def expand_files(patterns):
+    """
+    Expand glob patterns (for shells that do not) into a sorted list without duplicates
+    """
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(pattern) or [pattern])
+    return sorted(files)
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Rename and backfill fields in exam routine JSON files")
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES,
+                        help=f"JSON files or glob patterns (default: {' '.join(DEFAULT_FILES)})")
+    parser.add_argument("--rename", action="append", type=parse_assignment, default=[],
+                        metavar="OLD=NEW", help="rename a key (repeatable)")
+    parser.add_argument("--default", action="append", type=parse_assignment, default=[],
+                        metavar="KEY=VALUE",
+                        help="add KEY with VALUE where it is missing (repeatable; "
+                             "default: Syllabus= and Notes=)")
+    parser.add_argument("--schema", metavar="FILE", nargs="?", const=DEFAULT_SCHEMA_FILE,
+                        help="also rename every alias under sourceFields in the schema file "
+                             f"to its canonical key (default: {DEFAULT_SCHEMA_FILE})")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report what would change without writing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the migration described by the command line
+    """
+    args = parse_args(argv)
+
+    renames = {}
+    if args.schema:
+        try:
+            renames.update(schema_renames(args.schema))
+        except SchemaError as e:
+            print(f"❌ Invalid department schema: {e}")
+            return 1
+    renames.update(args.rename)
+    defaults = dict(args.default) if args.default else DEFAULT_FIELDS
+
+    files = expand_files(args.files)
+    print(f"🔧 Migrating {len(files)} file(s){' (dry run)' if args.dry_run else ''}...")
+    failed = migrate_files(files, Migration(renames, defaults), dry_run=args.dry_run)
+    return 1 if failed else 0
+
 
 if __name__ == "__main__":
-    # Process the CSE exam routine file
-    json_file = "media/cse_processed_exam_routine.json"
-    add_missing_fields(json_file)
+    sys.exit(main())
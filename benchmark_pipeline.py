@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+DIU Exam Routine Pipeline Benchmark
+
+Times each stage of process_exam_data.py on synthetic routines:
+- Generates realistic exam routines in the CSE or SWE field layout
+  (configurable departments, batches, sections, dates and rooms per course)
+- Times combine_json_files, clean_exam_data, group_exams_by_date_and_course,
+  convert_to_flat_array, get_statistics and serializing the output with the
+  JSON backend in use (orjson or json, see json_backend.py) at each size
+- Records peak traced memory per stage
+- Saves results as JSON and compares them with an earlier run
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import json_backend
+import process_exam_data as pipeline
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+TIME_SLOTS = [
+    ("A", "09:00 AM - 10:30 AM"),
+    ("B", "11:00 AM - 12:30 PM"),
+    ("C", "01:00 PM - 02:30 PM"),
+    ("D", "03:00 PM - 04:30 PM"),
+]
+
+COURSE_WORDS = ["Data", "Structures", "Algorithms", "Web", "Engineering", "Network",
+                "Communication", "Software", "Testing", "Database", "Systems",
+                "Artificial", "Intelligence", "Compiler", "Design", "Security"]
+
+SECTION_STYLES = ["{batch}_{letter}", "{batch}{letter}", "{batch} {letter}"]
+
+
+def generate_routine(rows, shape="cse", departments=3, batches=8, sections=6, dates=10,
+                     rooms_per_course=3, seed=0):
+    """
+    Generate a synthetic exam routine with exactly `rows` raw entries
+
+    Course offerings are spread over every department, batch and section;
+    each offering sits in `rooms_per_course` rooms on one date and slot.
+    Section names use the mixed raw formats seen in real input (61_A, 61A,
+    61 A). shape is "cse" (Dept./ID keys) or "swe" (Department/Course ID).
+    """
+    rng = random.Random(seed)
+    first_day = date(2025, 6, 28)
+    exam_dates = [(first_day + timedelta(days=d)).strftime("%d-%m-%Y") for d in range(dates)]
+    dept_names = ["CSE", "SWE", "EEE", "NFE", "BBA", "ENG", "CIS", "MCT"][:departments]
+    if len(dept_names) < departments:
+        dept_names += [f"D{i}" for i in range(len(dept_names), departments)]
+
+    entries = []
+    course_number = 0
+    while len(entries) < rows:
+        course_number += 1
+        for dept in dept_names:
+            for b in range(batches):
+                batch = 60 + b
+                course_id = f"{dept}{300 + course_number * 10 + b}"
+                title = " ".join(rng.sample(COURSE_WORDS, 2))
+                exam_date = exam_dates[(course_number + b) % dates]
+                slot, exam_time = TIME_SLOTS[(course_number + b) % len(TIME_SLOTS)]
+
+                for s in range(sections):
+                    letter = chr(ord("A") + s)
+                    section = rng.choice(SECTION_STYLES).format(batch=batch, letter=letter)
+                    teacher = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(3))
+                    seats = [rng.randint(5, 30) for _ in range(rooms_per_course)]
+                    total = str(sum(seats))
+
+                    for r, seat_count in enumerate(seats):
+                        if len(entries) >= rows:
+                            return entries
+                        room = f"{rng.randint(1, 9)}{rng.randint(0, 20):02d}"
+                        if shape == "swe":
+                            entries.append({
+                                "Department": dept,
+                                "Course ID": course_id,
+                                "Course Title": title,
+                                "Tech. Int.": teacher,
+                                "Section": section.replace(" ", "-"),
+                                "Room No": room,
+                                "Seat(s)": str(seat_count),
+                                "Total": total,
+                                "Date": exam_date,
+                                "Slot": slot,
+                                "Time": exam_time
+                            })
+                        else:
+                            entries.append({
+                                "Dept.": dept,
+                                "ID": course_id,
+                                "Course Title": title,
+                                "Tech. Int.": teacher,
+                                "Section": section,
+                                "Room No": room,
+                                "Seat(s)": str(seat_count),
+                                "Total": total if r == 0 else "",
+                                "Date": exam_date,
+                                "Time": exam_time if r == 0 else "",
+                                "Slot": slot if r == 0 else "",
+                                "Syllabus": "",
+                                "Notes": ""
+                            })
+    return entries
+
+
+def write_date_files(entries, folder):
+    """
+    Write entries into one <DD_MM_YYYY>.json file per exam date, like media/
+    """
+    by_date = defaultdict(list)
+    for entry in entries:
+        by_date[entry["Date"]].append(entry)
+
+    for exam_date, date_entries in by_date.items():
+        file_path = os.path.join(folder, exam_date.replace("-", "_") + ".json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(date_entries, f, indent=2, ensure_ascii=False)
+
+    return len(by_date)
+
+
+def measure(func, *args, memory=True):
+    """
+    Run func(*args) and return (result, seconds, peak traced bytes or None)
+
+    Timing comes from an untraced run; when memory is requested the stage is
+    run a second time under tracemalloc, whose overhead would skew timings.
+    Pipeline console output is suppressed.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+
+        peak = None
+        if memory:
+            tracemalloc.start()
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def serialize_output(exam_data):
+    """
+    Encode the processed entries the way process_exam_data.py writes them
+    """
+    return json_backend.dumps([record.to_dict() for record in exam_data])
+
+
+def benchmark_size(rows, options, memory=True):
+    """
+    Benchmark every pipeline stage on a routine of `rows` entries
+    """
+    entries = generate_routine(
+        rows, shape=options.shape, departments=options.departments,
+        batches=options.batches, sections=options.sections, dates=options.dates,
+        rooms_per_course=options.rooms, seed=options.seed
+    )
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_date_files(entries, folder)
+        del entries
+
+        stages = {}
+        combined, seconds, peak = measure(pipeline.combine_json_files, folder, memory=memory)
+        stages["combine_json_files"] = {"seconds": seconds, "peak_bytes": peak}
+
+    cleaned, seconds, peak = measure(pipeline.clean_exam_data, combined, memory=memory)
+    stages["clean_exam_data"] = {"seconds": seconds, "peak_bytes": peak}
+    del combined
+
+    grouped, seconds, peak = measure(pipeline.group_exams_by_date_and_course, cleaned, memory=memory)
+    stages["group_exams_by_date_and_course"] = {"seconds": seconds, "peak_bytes": peak}
+    del cleaned
+
+    flat, seconds, peak = measure(pipeline.convert_to_flat_array, grouped, memory=memory)
+    stages["convert_to_flat_array"] = {"seconds": seconds, "peak_bytes": peak}
+    del grouped
+
+    _, seconds, peak = measure(pipeline.get_statistics, flat, memory=memory)
+    stages["get_statistics"] = {"seconds": seconds, "peak_bytes": peak}
+
+    _, seconds, peak = measure(serialize_output, flat, memory=memory)
+    stages["serialize_output"] = {"seconds": seconds, "peak_bytes": peak}
+
+    return {
+        "rows": rows,
+        "stages": stages,
+        "total_seconds": sum(stage["seconds"] for stage in stages.values())
+    }
+
+
+def format_bytes(size):
+    """
+    Format a byte count for display
+    """
+    if size is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def print_result(result):
+    """
+    Print one size's stage timings
+    """
+    print(f"\n📏 {result['rows']:,} rows  (total {result['total_seconds']:.3f}s)")
+    for name, stage in result["stages"].items():
+        print(f"   • {name:<32} {stage['seconds']:>9.4f}s   peak {format_bytes(stage['peak_bytes'])}")
+
+
+def compare_results(current, previous):
+    """
+    Print per-stage time ratios against an earlier results file
+    """
+    earlier = {result["rows"]: result for result in previous.get("results", [])}
+
+    print(f"\n📊 Comparison with run from {previous.get('created', 'unknown')}")
+    for result in current["results"]:
+        old = earlier.get(result["rows"])
+        if old is None:
+            continue
+        print(f"   {result['rows']:,} rows:")
+        for name, stage in result["stages"].items():
+            old_stage = old["stages"].get(name)
+            if not old_stage or not old_stage["seconds"]:
+                continue
+            ratio = stage["seconds"] / old_stage["seconds"]
+            marker = "⚠️ " if ratio > 1.1 else "✅"
+            print(f"   {marker} {name:<32} {old_stage['seconds']:.4f}s -> "
+                  f"{stage['seconds']:.4f}s  ({ratio:.2f}x)")
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the exam routine processing pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="row counts to benchmark (default: 10^3 to 10^6)")
+    parser.add_argument("--shape", choices=("cse", "swe"), default="cse",
+                        help="input field layout to generate (default: cse)")
+    parser.add_argument("--departments", type=int, default=3)
+    parser.add_argument("--batches", type=int, default=8)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--dates", type=int, default=10)
+    parser.add_argument("--rooms", type=int, default=3, help="rooms per course section")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc pass (faster, no peak memory)")
+    parser.add_argument("--output", default="bench_results.json",
+                        help="where to save results (default: bench_results.json)")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="earlier results file to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the benchmark
+    """
+    options = parse_args(argv)
+
+    print("⏱️  DIU Exam Routine Pipeline Benchmark")
+    print("=" * 50)
+    print(f"Shape: {options.shape}, departments: {options.departments}, batches: {options.batches}, "
+          f"sections: {options.sections}, dates: {options.dates}, rooms/course: {options.rooms}, "
+          f"JSON backend: {json_backend.BACKEND}")
+
+    results = {
+        "created": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": {
+            "shape": options.shape,
+            "departments": options.departments,
+            "batches": options.batches,
+            "sections": options.sections,
+            "dates": options.dates,
+            "rooms": options.rooms,
+            "seed": options.seed,
+            "memory": not options.no_memory,
+            "json_backend": json_backend.BACKEND
+        },
+        "results": []
+    }
+
+    for rows in options.sizes:
+        result = benchmark_size(rows, options, memory=not options.no_memory)
+        results["results"].append(result)
+        print_result(result)
+
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {options.output}")
+
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as f:
+            compare_results(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
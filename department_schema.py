@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Shared department schema for the exam routine scripts and the website
+
+departments.json describes every department once: which input files feed
+it, where its processed routine is written and how the website shows it.
+process_exam_data.py reads it to build all departments in one run, and
+script.js reads it to configure the department tabs, so both always agree
+on file names and field names.
+
+Processed output always uses the canonical record keys ("Dept.", "ID",
+"Tech. Int.", ...). Raw input files may use any alias listed for a key
+under "sourceFields"; a department can add its own aliases on top.
+"""
+
+import json
+import os
+
+SCHEMA_VERSION = 1
+
+DEFAULT_SCHEMA_FILE = "departments.json"
+
+
+class SchemaError(ValueError):
+    """
+    Raised when the department schema file is missing fields or malformed
+    """
+
+
+class Department:
+    """
+    One department's build settings from the schema file
+
+    inputs and output are resolved relative to the schema file's folder.
+    source_fields maps each canonical key to the raw keys it may be read
+    from, in priority order.
+    """
+
+    __slots__ = ("key", "name", "inputs", "output", "source_fields", "config")
+
+    def __init__(self, key, name, inputs, output, source_fields, config):
+        self.key = key
+        self.name = name
+        self.inputs = inputs
+        self.output = output
+        self.source_fields = source_fields
+        self.config = config
+
+    def __repr__(self):
+        return f"Department({self.key!r}, {self.output!r})"
+
+
+def merge_source_fields(*mappings):
+    """
+    Combine sourceFields mappings; later mappings take priority
+
+    Every key is always readable under its own name, so the canonical key
+    comes first unless a mapping lists it explicitly.
+    """
+    merged = {}
+    for mapping in mappings:
+        for key, aliases in (mapping or {}).items():
+            if isinstance(aliases, str):
+                aliases = [aliases]
+            if key not in aliases:
+                aliases = [key, *aliases]
+            merged[key] = tuple(aliases)
+    return merged
+
+
+def alias_map(source_fields):
+    """
+    Return {raw key: canonical key} for every alias in source_fields
+    """
+    aliases = {}
+    for key, names in source_fields.items():
+        for name in names:
+            aliases.setdefault(name, key)
+    return aliases
+
+
+def normalize_keys(entry, aliases):
+    """
+    Return a copy of a raw entry with aliased keys renamed to canonical keys
+
+    Key order is kept; when an entry carries both a key and its alias, the
+    first one wins.
+    """
+    normalized = {}
+    for name, value in entry.items():
+        key = aliases.get(name, name)
+        if key not in normalized:
+            normalized[key] = value
+    return normalized
+
+
+def load_schema(schema_file=DEFAULT_SCHEMA_FILE):
+    """
+    Load and check the raw schema dict
+    """
+    try:
+        with open(schema_file, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+    except OSError as e:
+        raise SchemaError(f"cannot read {schema_file}: {e}") from e
+    except json.JSONDecodeError as e:
+        raise SchemaError(f"{schema_file} is not valid JSON: {e}") from e
+
+    if not isinstance(schema, dict) or schema.get("version") != SCHEMA_VERSION:
+        raise SchemaError(f"{schema_file} is not a version {SCHEMA_VERSION} department schema")
+    if not isinstance(schema.get("departments"), dict) or not schema["departments"]:
+        raise SchemaError(f"{schema_file} defines no departments")
+
+    return schema
+
+
+def load_departments(schema_file=DEFAULT_SCHEMA_FILE):
+    """
+    Return the schema's departments as Department objects, in file order
+    """
+    schema = load_schema(schema_file)
+    base_dir = os.path.dirname(schema_file)
+    departments = []
+
+    for key, config in schema["departments"].items():
+        for field in ("name", "inputs", "file"):
+            if not config.get(field):
+                raise SchemaError(f"department '{key}' is missing '{field}'")
+
+        departments.append(Department(
+            key=key,
+            name=config["name"],
+            inputs=[os.path.join(base_dir, pattern) for pattern in config["inputs"]],
+            output=os.path.join(base_dir, config["file"]),
+            source_fields=merge_source_fields(schema.get("sourceFields"),
+                                              config.get("sourceFields")),
+            config=config
+        ))
+
+    return departments
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Pluggable JSON serialization for the exam routine scripts
+
+Uses orjson when it is installed and the standard library json module
+otherwise. Both backends produce the same bytes for routine data, so
+outputs do not depend on which one ran:
+- loads()/read_json() decode bytes read straight from disk
+- dumps() returns UTF-8 bytes: compact by default (site-facing files), or
+  with pretty=True the 2-space layout of json.dump(indent=2, ensure_ascii=False)
+
+Set EXAM_ROUTINE_JSON=json to force the standard library, e.g. to compare
+timings.
+"""
+
+import codecs
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.environ.get("EXAM_ROUTINE_JSON") == "json":
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# orjson.JSONDecodeError subclasses it, so callers catch this one name
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """
+    Decode JSON from bytes or str
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, pretty=False, default=None):
+    """
+    Encode obj as UTF-8 JSON bytes, compact unless pretty=True
+
+    default converts objects neither backend knows, as in json.dumps().
+    Values orjson cannot encode (e.g. integers beyond 64 bits) fall back to
+    the standard library.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            pass
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                      default=default).encode('utf-8')
+
+
+def read_json(file_path):
+    """
+    Read and decode a JSON file in one read; a UTF-8 byte order mark is ignored
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    return loads(data)
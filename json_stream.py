@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON helpers for the exam routine scripts
+
+- iter_json_array() reads the items of a top-level JSON array one at a time
+  without loading the whole file into memory
+- JsonArrayWriter writes an array item by item to a binary file, producing
+  the same bytes as json_backend.dumps(items)
+- atomic_write() replaces a file only once its new contents are complete, so
+  the website never fetches a half-written JSON file, and can leave files
+  whose contents did not change untouched
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from json_backend import dumps
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+# Characters that can continue a number, e.g. "12" + ".5" or "1" + "e3"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class NotAJSONArray(ValueError):
+    """
+    Raised when a file's top-level value is not a JSON array
+    """
+
+
+def iter_json_array(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Yield the items of the top-level JSON array in file_path one at a time
+
+    Only one chunk plus the item being decoded is held in memory. Raises
+    NotAJSONArray if the file does not start with '[' and
+    json.JSONDecodeError on malformed input (items decoded before the error
+    have already been yielded).
+    """
+    decoder = json.JSONDecoder()
+
+    # utf-8-sig drops the byte order mark Windows tools write, like read_json()
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if chunk:
+                buffer = buffer[pos:] + chunk
+                pos = 0
+            else:
+                eof = True
+            return bool(chunk)
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Expecting value", buffer, pos)
+        if buffer[pos] != '[':
+            raise NotAJSONArray("top-level value is not an array")
+        pos += 1
+
+        skip_whitespace()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        while True:
+            # Decode the next item, reading more data while it is incomplete.
+            # A value ending exactly at the buffer end, or a number followed
+            # by a character that could continue it ("12." of "12.5"), may be
+            # truncated, so it is only accepted once more data or the end of
+            # the file is seen.
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                truncated = end == len(buffer) or (
+                    isinstance(item, (int, float)) and buffer[end] in _NUMBER_CHARS)
+                if truncated and not eof and fill():
+                    continue
+                break
+
+            pos = end
+            yield item
+
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            if buffer[pos] == ']':
+                return
+            if buffer[pos] != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            skip_whitespace()
+
+
+class JsonArrayWriter:
+    """
+    Write a JSON array to a binary file one item at a time
+
+    Output is byte-identical to json_backend.dumps(items, pretty), so
+    streamed and non-streamed runs produce the same files.
+    """
+
+    def __init__(self, f, pretty=False):
+        self.f = f
+        self.pretty = pretty
+        self.count = 0
+
+    def write(self, item):
+        """
+        Append one item to the array
+        """
+        data = dumps(item, self.pretty)
+        if self.pretty:
+            data = b"  " + data.replace(b"\n", b"\n  ")
+            separator = b",\n" if self.count else b"[\n"
+        else:
+            separator = b"," if self.count else b"["
+        self.f.write(separator + data)
+        self.count += 1
+
+    def write_all(self, items):
+        """
+        Append every item from an iterable and return the number written
+        """
+        for item in items:
+            self.write(item)
+        return self.count
+
+    def close(self):
+        """
+        Terminate the array
+        """
+        if not self.count:
+            self.f.write(b"[]")
+        elif self.pretty:
+            self.f.write(b"\n]")
+        else:
+            self.f.write(b"]")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+class AtomicWrite:
+    """
+    Context manager behind atomic_write(); see there
+
+    After the block, changed tells whether file_path was replaced and
+    sha256 holds the hex digest of its contents. Calling cancel() inside
+    the block leaves file_path untouched.
+    """
+
+    def __init__(self, file_path, mode='w', encoding='utf-8', skip_unchanged=False):
+        self.file_path = file_path
+        self.mode = mode
+        self.encoding = encoding
+        self.skip_unchanged = skip_unchanged
+        self.changed = False
+        self.sha256 = None
+        self._temp_path = None
+        self._cancelled = False
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        fd, self._temp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(self.file_path)}.", suffix=".tmp", dir=directory)
+        try:
+            if 'b' in self.mode:
+                self._file = os.fdopen(fd, self.mode)
+            else:
+                self._file = os.fdopen(fd, self.mode, encoding=self.encoding)
+        except BaseException:
+            os.close(fd)
+            self._discard()
+            raise
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._file.close()
+            if exc_type is not None or self._cancelled:
+                self._discard()
+                return False
+
+            self.sha256 = file_sha256(self._temp_path)
+            if self.skip_unchanged and self._same_as_existing():
+                self._discard()
+                return False
+
+            os.chmod(self._temp_path, 0o644)
+            os.replace(self._temp_path, self.file_path)
+            self.changed = True
+        except BaseException:
+            self._discard()
+            raise
+        return False
+
+    def cancel(self):
+        """
+        Discard everything written so far instead of replacing file_path
+        """
+        self._cancelled = True
+
+    def _same_as_existing(self):
+        try:
+            if os.path.getsize(self.file_path) != os.path.getsize(self._temp_path):
+                return False
+        except OSError:
+            return False
+        return file_sha256(self.file_path) == self.sha256
+
+    def _discard(self):
+        try:
+            os.unlink(self._temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def atomic_write(file_path, mode='w', encoding='utf-8', skip_unchanged=False):
+    """
+    Open a temporary file next to file_path and move it into place on success
+
+    The temporary file is in the same directory so the final os.replace() is
+    an atomic rename; readers see either the old or the new file. If the
+    block raises, the temporary file is removed and file_path is untouched.
+    With skip_unchanged=True, a file_path whose bytes would not change is
+    left alone, keeping its mtime so HTTP caches stay valid. The returned
+    AtomicWrite reports changed and sha256 after the block.
+    """
+    return AtomicWrite(file_path, mode, encoding, skip_unchanged)
+
+
+def file_sha256(file_path):
+    """
+    Return the SHA-256 hex digest of a file's contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
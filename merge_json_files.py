@@ -3,17 +3,105 @@
 """
 JSON File Merger Script
 Combines all JSON files from media/data folder into a single swe_summer_mid.json file
-Also automatically formats section fields (replaces hyphens with spaces)
+Also automatically formats section fields (replaces hyphens with spaces) and
+renames fields to the canonical keys of the shared schema (departments.json)
 """
 
-import json
+import argparse
+import functools
 import os
 from pathlib import Path
 
-def merge_json_files():
+from department_schema import (DEFAULT_SCHEMA_FILE, alias_map, load_schema,
+                               merge_source_fields, normalize_keys)
+from json_backend import JSONDecodeError, dumps, read_json
+from json_stream import JsonArrayWriter, NotAJSONArray, atomic_write, iter_json_array
+from routine_stats import RoutineStatistics
+
+SCHEMA_FILE = Path(__file__).parent / DEFAULT_SCHEMA_FILE
+
+@functools.lru_cache(maxsize=1)
+def key_aliases():
+    """
+    Return {raw key: canonical key} for the SWE department from the shared schema
+    """
+    schema = load_schema(SCHEMA_FILE)
+    department = schema["departments"].get("swe", {})
+    return alias_map(merge_source_fields(schema.get("sourceFields"),
+                                         department.get("sourceFields")))
+
+def format_entry(entry):
+    """
+    Rename an entry's fields to canonical keys and replace hyphens in its section
+    """
+    if isinstance(entry, dict):
+        entry = normalize_keys(entry, key_aliases())
+        if entry.get('Section'):
+            entry['Section'] = entry['Section'].replace('-', ' ')
+    return entry
+
+def iter_file_entries(json_file):
+    """
+    Yield the formatted entries of one JSON file, streaming top-level arrays
+    """
+    try:
+        for entry in iter_json_array(json_file):
+            yield format_entry(entry)
+    except NotAJSONArray:
+        # Single-object files are small; load them whole
+        file_data = read_json(json_file)
+        if isinstance(file_data, list):
+            yield from (format_entry(entry) for entry in file_data)
+        elif isinstance(file_data, dict):
+            yield format_entry(file_data)
+        else:
+            print(f"   ⚠️  Warning: Unexpected data format in {json_file.name}")
+
+def merge_json_files_streaming(json_files, output_file, pretty=False):
+    """
+    Merge JSON files entry by entry without holding them in memory
+
+    Entries are written through atomic_write(), so output_file is replaced
+    only when at least one entry was merged and the temporary file is
+    removed if anything fails. The output is compact unless pretty=True.
+    """
+    output = atomic_write(output_file, 'wb')
+    with output as out:
+        with JsonArrayWriter(out, pretty) as writer:
+            for json_file in sorted(json_files):
+                print(f"📄 Processing: {json_file.name}")
+                before = writer.count
+                try:
+                    writer.write_all(iter_file_entries(json_file))
+                    print(f"   ✅ Added {writer.count - before} entries from {json_file.name}")
+                except JSONDecodeError as e:
+                    print(f"   ❌ Error reading {json_file.name}: Invalid JSON format - {e} "
+                          f"({writer.count - before} entries kept)")
+                except Exception as e:
+                    print(f"   ❌ Error processing {json_file.name}: {e}")
+        total = writer.count
+        if not total:
+            output.cancel()
+    
+    if not total:
+        print("❌ No data to merge!")
+        return False
+    
+    print(f"\n✅ Successfully merged {total} entries into {output_file}")
+    print(f"📊 Total files processed: {len(json_files)}")
+    print(f"💾 Output saved to: {output_file.absolute()}")
+    
+    return True
+
+def merge_json_files(stream=False, pretty=False):
     """
     Merge all JSON files from media/data folder into swe_summer_mid.json
-    Also formats section fields by replacing hyphens with spaces
+    Also formats section fields by replacing hyphens with spaces and renames
+    fields to the canonical keys
+
+    With stream=True, entries are read and written one at a time so memory
+    use stays bounded regardless of input size. The website reads the
+    output, so it is written compact unless pretty=True.
     """
     # Define paths
     data_folder = Path("media/Data")
@@ -33,6 +121,9 @@ def merge_json_files():
     
     print(f"📁 Found {len(json_files)} JSON files in {data_folder}")
     
+    if stream:
+        return merge_json_files_streaming(json_files, output_file, pretty)
+    
     # Combined data list
     merged_data = []
     
@@ -41,34 +132,24 @@ def merge_json_files():
         try:
             print(f"📄 Processing: {json_file.name}")
             
-            with open(json_file, 'r', encoding='utf-8') as f:
-                file_data = json.load(f)
+            file_data = read_json(json_file)
             
             # Handle different data structures and fix section formatting
             if isinstance(file_data, list):
                 # Process each entry and fix section formatting
-                processed_entries = []
-                for entry in file_data:
-                    # Fix section field if it exists
-                    if isinstance(entry, dict) and 'Section' in entry and entry['Section']:
-                        entry['Section'] = entry['Section'].replace('-', ' ')
-                    processed_entries.append(entry)
+                processed_entries = [format_entry(entry) for entry in file_data]
                 
                 # If file contains a list of objects, extend the merged data
                 merged_data.extend(processed_entries)
                 print(f"   ✅ Added {len(processed_entries)} entries from {json_file.name}")
             elif isinstance(file_data, dict):
-                # Fix section field if it exists
-                if 'Section' in file_data and file_data['Section']:
-                    file_data['Section'] = file_data['Section'].replace('-', ' ')
-                
-                # If file contains a single object, append it
-                merged_data.append(file_data)
+                # Fix section field if it exists, then append the single object
+                merged_data.append(format_entry(file_data))
                 print(f"   ✅ Added 1 entry from {json_file.name}")
             else:
                 print(f"   ⚠️  Warning: Unexpected data format in {json_file.name}")
                 
-        except json.JSONDecodeError as e:
+        except JSONDecodeError as e:
             print(f"   ❌ Error reading {json_file.name}: Invalid JSON format - {e}")
         except Exception as e:
             print(f"   ❌ Error processing {json_file.name}: {e}")
@@ -79,8 +160,8 @@ def merge_json_files():
     
     # Save merged data to output file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, indent=2, ensure_ascii=False)
+        with atomic_write(output_file, 'wb') as f:
+            f.write(dumps(merged_data, pretty))
         
         print(f"\n✅ Successfully merged {len(merged_data)} entries into {output_file}")
         print(f"📊 Total files processed: {len(json_files)}")
@@ -95,6 +176,8 @@ def merge_json_files():
 def validate_merged_file():
     """
     Validate the merged JSON file and show summary
+
+    Streams the file once through RoutineStatistics instead of loading it.
     """
     output_file = Path("media/swe_summer_mid.json")
     
@@ -103,41 +186,29 @@ def validate_merged_file():
         return
     
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        stats = RoutineStatistics()
+        first_entry = None
+        for entry in iter_json_array(output_file):
+            if first_entry is None:
+                first_entry = entry
+            stats.add(entry)
         
         print(f"\n📋 Validation Summary:")
-        print(f"   Total entries: {len(data)}")
+        print(f"   Total entries: {stats.total}")
         
-        if data:
+        if stats.total:
             # Show sample fields from first entry
-            first_entry = data[0]
             print(f"   Sample fields: {list(first_entry.keys())}")
             
-            # Count unique dates and sections
-            dates = set()
-            departments = set()
-            sections_with_hyphen = 0
-            sections_with_space = 0
-            
-            for entry in data:
-                if 'Date' in entry and entry['Date']:
-                    dates.add(entry['Date'])
-                if 'Department' in entry and entry['Department']:
-                    departments.add(entry['Department'])
-                if 'Section' in entry and entry['Section']:
-                    if '-' in entry['Section']:
-                        sections_with_hyphen += 1
-                    elif ' ' in entry['Section']:
-                        sections_with_space += 1
-            
-            print(f"   Unique dates: {len(dates)} - {sorted(dates)}")
-            print(f"   Departments: {sorted(departments)}")
+            dates = sorted(stats.date_counts)
+            departments = sorted(d for d in stats.departments if d)
+            print(f"   Unique dates: {len(dates)} - {dates}")
+            print(f"   Departments: {departments}")
             print(f"   Section formatting:")
-            print(f"     - With hyphens: {sections_with_hyphen}")
-            print(f"     - With spaces: {sections_with_space}")
+            print(f"     - With hyphens: {stats.sections_with_hyphen}")
+            print(f"     - With spaces: {stats.sections_with_space}")
             
-            if sections_with_hyphen == 0:
+            if stats.sections_with_hyphen == 0:
                 print("   ✅ All sections properly formatted with spaces!")
             else:
                 print("   ⚠️  Some sections still contain hyphens")
@@ -148,6 +219,13 @@ def validate_merged_file():
         print(f"❌ Error validating merged file: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge media/Data JSON files into swe_summer_mid.json")
+    parser.add_argument("--stream", action="store_true",
+                        help="read and write entries one at a time to bound memory use")
+    parser.add_argument("--pretty", action="store_true",
+                        help="indent the merged file for reading (default: compact)")
+    args = parser.parse_args()
+    
     print("🔄 Starting JSON file merger...")
     print("=" * 50)
     
@@ -156,7 +234,7 @@ if __name__ == "__main__":
     os.chdir(script_dir)
     
     # Merge files
-    success = merge_json_files()
+    success = merge_json_files(stream=args.stream, pretty=args.pretty)
     
     if success:
         # Validate the result
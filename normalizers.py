@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Memoized normalizers for exam routine fields
+
+Sections, dates and times have only a few hundred distinct values across a
+routine, so every normalizer here is cached on the raw value: cleaning and
+sorting cost grows with the number of distinct values, not with rows.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+
+_SEPARATORS = re.compile(r'[_\-\s]+')
+_NUMBER_LETTER = re.compile(r'(\d+)([A-Z])')
+_BATCH = re.compile(r'^(\d+)')
+_TIME_RANGE = re.compile(
+    r'(\d{1,2}):(\d{2})\s*(AM|PM)\s*-\s*(\d{1,2}):(\d{2})\s*(AM|PM)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def standardize_section_name(section):
+    """
+    Standardize section names to format like "61 A"
+    Handles formats: 67_A, 67-A, 67A, 67 A -> 67 A
+    """
+    if not section:
+        return section
+
+    # Replace underscores, hyphens and runs of whitespace with a single space
+    clean_section = _SEPARATORS.sub(' ', section.strip())
+
+    # Add space between number and letter if missing
+    clean_section = _NUMBER_LETTER.sub(r'\1 \2', clean_section)
+
+    return clean_section.upper()
+
+
+@lru_cache(maxsize=1024)
+def standardize_date(date_str):
+    """
+    Ensure date is in DD-MM-YYYY format
+    """
+    if not date_str:
+        return date_str
+
+    parts = date_str.split('-')
+    if len(parts) == 3:
+        day, month, year = parts
+        return f"{day.zfill(2)}-{month.zfill(2)}-{year}"
+
+    return date_str
+
+
+@lru_cache(maxsize=1024)
+def date_ordinal(date_str):
+    """
+    Return the proleptic ordinal of a DD-MM-YYYY date, or None if invalid
+    """
+    try:
+        return datetime.strptime(date_str, "%d-%m-%Y").toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def date_sort_key(date_str):
+    """
+    Sort key for DD-MM-YYYY strings; unparseable dates sort last
+    """
+    ordinal = date_ordinal(date_str)
+    if ordinal is None:
+        return (1, 0, date_str or "")
+    return (0, ordinal, "")
+
+
+@lru_cache(maxsize=1024)
+def parse_time_range(time_str):
+    """
+    Parse "09:00 AM - 10:30 AM" into (start, end) minutes after midnight
+
+    Returns None when the string is empty or not a time range. Mirrors the
+    time parsing in script.js.
+    """
+    match = _TIME_RANGE.search(time_str or "")
+    if not match:
+        return None
+
+    def minutes(hour, minute, period):
+        hour = int(hour) % 12
+        if period.upper() == 'PM':
+            hour += 12
+        return hour * 60 + int(minute)
+
+    return minutes(*match.group(1, 2, 3)), minutes(*match.group(4, 5, 6))
+
+
+@lru_cache(maxsize=4096)
+def extract_batch(section):
+    """
+    Extract the batch number from a section name (e.g. "61 A" -> "61")
+
+    Mirrors extractBatch() in script.js.
+    """
+    match = _BATCH.match(section or "")
+    return match.group(1) if match else ""
@@ -9,309 +9,1570 @@ This script processes and standardizes exam routine data:
 - Saves processed data to media folder
 """
 
-import json
+import argparse
+import cProfile
+import functools
+import gzip
+import hashlib
 import os
-import re
 import glob
-from datetime import datetime
-from collections import defaultdict, OrderedDict
+from datetime import datetime, timezone
+from collections import Counter, defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from operator import attrgetter
+from sys import intern
 
+from department_schema import DEFAULT_SCHEMA_FILE, SchemaError, load_departments
+from json_backend import JSONDecodeError, dumps, read_json
+from json_stream import (JsonArrayWriter, NotAJSONArray, atomic_write, file_sha256,
+                         iter_json_array)
+from normalizers import (date_ordinal, date_sort_key, extract_batch, parse_time_range,
+                         standardize_date, standardize_section_name)
+from record_validator import RecordValidator, ValidationReport, problem_row
+from routine_db import DEFAULT_DATABASE, export_routine
+from routine_stats import RoutineStatistics
+from section_routines import write_section_routines
+from stage_profiler import StageProfiler
 
-def combine_json_files(media_folder):
+try:
+    import brotli
+except ImportError:  # optional: only needed for .br precompressed files
+    brotli = None
+
+# Bump when the cleaned record layout changes so stale caches are discarded
+MANIFEST_VERSION = 3
+
+
+# Files written by this script into the media folder that must never be
+# picked up again as input
+ARTIFACT_SUFFIXES = ("_summary.json", "_manifest.json", "_index.json", "_columns.json",
+                     "_validation.json", "_conflicts.json", "_sessions.json")
+
+# Bump when the search index layout changes; script.js checks it
+SEARCH_INDEX_VERSION = 1
+
+# Bump when the shard manifest layout changes; script.js checks it
+SHARD_MANIFEST_VERSION = 1
+
+# Date shard for rows whose Date is not a valid DD-MM-YYYY date, so it is
+# never used as a file name; script.js leaves it out of the date filter
+UNKNOWN_DATE_SHARD = "unknown"
+
+# Bump when the columnar output layout changes; script.js checks it
+COLUMNAR_VERSION = 1
+
+# Bump when the sessions output layout changes; script.js checks it
+SESSIONS_VERSION = 1
+
+# Bump when the delta file layout changes; script.js checks it
+DELTA_VERSION = 1
+
+# Versions kept in the summary's version chain, each with its delta
+DELTA_HISTORY = 10
+
+# A --config build is refused when a department's inputs hold less than this
+# fraction of the rows in the routine it would replace (inputs gone missing)
+MIN_ROW_FRACTION = 0.5
+
+# Fields identifying a row when diffing routine versions
+DELTA_KEY_FIELDS = ("Date", "ID", "Section", "Room No")
+
+
+# Output key -> raw keys clean_exam_record() reads it from, in priority order
+LEGACY_SOURCE_FIELDS = {
+    "Dept.": ("Dept.", "Department"),
+    "ID": ("ID", "Course ID"),
+}
+
+
+class ExamRecord:
+    """
+    One exam row (a course section in one room)
+
+    Slotted to keep large routines compact; repeated values are interned by
+    clean_exam_record(). Supports exam["Section"]-style access with the
+    original JSON keys, and converts to a dict only when serialized.
+    """
+    
+    __slots__ = ("dept", "course_id", "title", "teacher", "section", "room_no",
+                 "seats", "total", "date", "time", "slot", "syllabus", "notes")
+    
+    # Output JSON key -> attribute, in output order
+    KEYS = OrderedDict([
+        ("Dept.", "dept"),
+        ("ID", "course_id"),
+        ("Course Title", "title"),
+        ("Tech. Int.", "teacher"),
+        ("Section", "section"),
+        ("Room No", "room_no"),
+        ("Seat(s)", "seats"),
+        ("Total", "total"),
+        ("Date", "date"),
+        ("Time", "time"),
+        ("Slot", "slot"),
+        ("Syllabus", "syllabus"),
+        ("Notes", "notes"),
+    ])
+    
+    # Output keys and a getter returning the attributes in the same order,
+    # so to_dict() is a single zip when writing thousands of records
+    _NAMES = tuple(KEYS)
+    _VALUES = attrgetter(*KEYS.values())
+    
+    def __init__(self, dept="", course_id="", title="", teacher="", section="",
+                 room_no="", seats="", total="", date="", time="", slot="",
+                 syllabus="", notes=""):
+        self.dept = dept
+        self.course_id = course_id
+        self.title = title
+        self.teacher = teacher
+        self.section = section
+        self.room_no = room_no
+        self.seats = seats
+        self.total = total
+        self.date = date
+        self.time = time
+        self.slot = slot
+        self.syllabus = syllabus
+        self.notes = notes
+    
+    def __getitem__(self, key):
+        return getattr(self, self.KEYS[key])
+    
+    def get(self, key, default=None):
+        attr = self.KEYS.get(key)
+        return getattr(self, attr) if attr else default
+    
+    def __eq__(self, other):
+        if not isinstance(other, ExamRecord):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in self.__slots__)
+    
+    def __repr__(self):
+        return f"ExamRecord({self.course_id!r}, {self.section!r}, {self.date!r}, {self.room_no!r})"
+    
+    def to_dict(self):
+        """
+        Return the record as a dict with the output JSON keys
+        """
+        return dict(zip(self._NAMES, self._VALUES(self)))
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from a dict with the output JSON keys
+        """
+        return cls(*(intern(data.get(key, "")) for key in cls.KEYS))
+
+
+class RoomAllocation:
+    """
+    Seats allocated to a course section in one room
+    """
+    
+    __slots__ = ("room_no", "seats")
+    
+    def __init__(self, room_no, seats):
+        self.room_no = room_no
+        self.seats = seats
+
+
+class CourseGroup:
+    """
+    A course section on one date with all of its room allocations
+    """
+    
+    __slots__ = ("info", "total", "rooms")
+    
+    def __init__(self, info):
+        self.info = info
+        self.total = info.total or ""
+        self.rooms = []
+
+
+class BuildOptions:
+    """
+    Ingest and output options shared by every build mode
+
+    The defaults match a plain run of this script; from_args() reads the
+    command line.
+    """
+    
+    __slots__ = ("workers", "validate", "shards", "columnar", "sessions", "section_files",
+                 "precompress", "database", "deltas", "pretty")
+    
+    def __init__(self, workers=1, validate=True, shards=False, columnar=False, sessions=False,
+                 section_files=False, precompress=False, database=None, deltas=False,
+                 pretty=False):
+        self.workers = workers
+        self.validate = validate
+        self.shards = shards
+        self.columnar = columnar
+        self.sessions = sessions
+        self.section_files = section_files
+        self.precompress = precompress
+        self.database = database
+        self.deltas = deltas
+        self.pretty = pretty
+    
+    @classmethod
+    def from_args(cls, args):
+        """
+        Build the options from parse_args() results
+        """
+        return cls(workers=args.workers, validate=not args.no_validate, shards=args.shards,
+                   columnar=args.columnar, sessions=args.sessions,
+                   section_files=args.section_routines, precompress=args.precompress,
+                   database=args.sqlite, deltas=args.deltas, pretty=args.pretty)
+
+
+def find_input_files(patterns, exclude=()):
+    """
+    Return the sorted list of input JSON files matching any glob pattern
+
+    Paths in exclude (e.g. the output file itself) are left out.
+    """
+    json_files = {f for pattern in patterns for f in glob.glob(pattern)}
+    return sorted(f for f in json_files if is_input_file(f, exclude))
+
+
+def is_input_file(file_path, exclude=()):
+    """
+    Return False for processed files, our own artifacts and paths in exclude
+    """
+    # Never read our own output back, to avoid recursion
+    return (not os.path.basename(file_path).startswith("processed_")
+            and not file_path.endswith(ARTIFACT_SUFFIXES)
+            and os.path.abspath(file_path) not in {os.path.abspath(path) for path in exclude})
+
+
+def find_json_files(media_folder, exclude=()):
+    """
+    Return the sorted list of input JSON files in the media folder
+
+    Paths in exclude (e.g. the output file itself) are left out.
+    """
+    return find_input_files([os.path.join(media_folder, "*.json")], exclude)
+
+
+def read_json_file(file_path):
+    """
+    Load one input file; returns (list of entries or None, status message)
+    """
+    filename = os.path.basename(file_path)
+    try:
+        data = read_json(file_path)
+        
+        if isinstance(data, list):
+            return data, f"   ✅ {filename}: {len(data)} entries"
+        
+        return None, f"   ⚠️  {filename}: Not a list, skipping"
+        
+    except JSONDecodeError as e:
+        return None, f"   ❌ {filename}: JSON decode error - {e}"
+    except Exception as e:
+        return None, f"   ❌ {filename}: Error - {e}"
+
+
+def status_text(message):
+    """
+    Return a read_json_file() message without its indent, emoji and file name
+    """
+    return message.split(": ", 1)[-1]
+
+
+@functools.lru_cache(maxsize=1)
+def default_validator():
+    """
+    Return the validator matching clean_exam_record(), compiled once per process
+    """
+    return RecordValidator(ExamRecord.KEYS, LEGACY_SOURCE_FIELDS)
+
+
+def validate_entries(data, validate=True):
+    """
+    Split one file's entries into (kept entries, quarantined rows, warned rows)
+
+    With validate=False every entry is kept without checks.
+    """
+    if not validate:
+        return data, [], []
+    return default_validator().split(data)
+
+
+def load_and_clean_file(file_path, validate=False):
+    """
+    Load, validate and clean one input file
+
+    Returns (cleaned entries or None, status message, quarantined rows,
+    warned rows). Runs in worker processes when ingest is parallel, so it
+    must not print.
+    """
+    data, message = read_json_file(file_path)
+    if data is None:
+        return None, message, [], []
+    data, quarantined, warnings = validate_entries(data, validate)
+    return clean_exam_data(data), message, quarantined, warnings
+
+
+def map_files(func, file_paths, workers=1):
+    """
+    Apply func to every file path, in a process pool when workers > 1
+
+    Results are returned in the order of file_paths either way.
+    """
+    if workers > 1 and len(file_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as pool:
+            return list(pool.map(func, file_paths))
+    return [func(file_path) for file_path in file_paths]
+
+
+def combine_json_files(media_folder, exclude=(), report=None):
     """
     Combine all JSON files in the media folder into one dataset
+
+    When a ValidationReport is passed, every file is validated into it and
+    quarantined entries are left out.
     """
     combined_data = []
-    json_files = []
     
     # Find all JSON files in the media folder
-    json_pattern = os.path.join(media_folder, "*.json")
-    json_files = glob.glob(json_pattern)
-    
-    # Filter out processed files to avoid recursion
-    json_files = [f for f in json_files if not os.path.basename(f).startswith("processed_")]
+    json_files = find_json_files(media_folder, exclude)
     
     if not json_files:
         print(f"❌ No JSON files found in {media_folder}")
         return None
     
     print(f"📁 Found {len(json_files)} JSON files to combine:")
-    for file_path in sorted(json_files):
+    for file_path in json_files:
         filename = os.path.basename(file_path)
         print(f"   • {filename}")
     
     # Combine all JSON files
-    for file_path in sorted(json_files):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            if isinstance(data, list):
-                combined_data.extend(data)
-                print(f"   ✅ {os.path.basename(file_path)}: {len(data)} entries")
-            else:
-                print(f"   ⚠️  {os.path.basename(file_path)}: Not a list, skipping")
-                
-        except json.JSONDecodeError as e:
-            print(f"   ❌ {os.path.basename(file_path)}: JSON decode error - {e}")
-        except Exception as e:
-            print(f"   ❌ {os.path.basename(file_path)}: Error - {e}")
+    for file_path in json_files:
+        filename = os.path.basename(file_path)
+        data, message = read_json_file(file_path)
+        print(message)
+        if data is None:
+            if report is not None:
+                report.add_file(file_path, 0, error=status_text(message))
+            continue
+        
+        if report is not None:
+            rows = len(data)
+            data, quarantined, warnings = validate_entries(data)
+            report.add_file(file_path, rows, quarantined, warnings=warnings)
+        combined_data.extend(data)
     
     print(f"\n🔗 Combined total: {len(combined_data)} entries")
     return combined_data
 
 
-def standardize_section_name(section):
+def combine_and_clean_parallel(media_folder, workers, exclude=(), report=None):
     """
-    Standardize section names to format like "61 A"
-    Handles formats: 67_A, 67A, 67 A -> 67 A
+    Load and clean all JSON files in the media folder using a process pool
+
+    Each worker parses, validates (when a ValidationReport is passed) and
+    cleans one file; results are merged in sorted file order so the output
+    matches a sequential run.
     """
-    if not section:
-        return section
+    combined_data = []
     
-    # Clean the section name
-    clean_section = section.strip()
+    json_files = find_json_files(media_folder, exclude)
     
-    # Replace underscore with space
-    clean_section = clean_section.replace('_', ' ')
+    if not json_files:
+        print(f"❌ No JSON files found in {media_folder}")
+        return None
     
-    # Add space between number and letter if missing
-    clean_section = re.sub(r'(\d+)([A-Z])', r'\1 \2', clean_section)
+    print(f"📁 Found {len(json_files)} JSON files to combine ({workers} workers):")
+    for file_path in json_files:
+        filename = os.path.basename(file_path)
+        print(f"   • {filename}")
     
-    # Replace multiple spaces with single space
-    clean_section = re.sub(r'\s+', ' ', clean_section)
+    load = functools.partial(load_and_clean_file, validate=report is not None)
+    for file_path, (records, message, quarantined, warnings) in zip(
+            json_files, map_files(load, json_files, workers)):
+        print(message)
+        if report is not None:
+            if records is None:
+                report.add_file(file_path, 0, error=status_text(message))
+            else:
+                report.add_file(file_path, len(records) + len(quarantined), quarantined,
+                                warnings=warnings)
+        if records is not None:
+            combined_data.extend(records)
     
-    return clean_section.upper()
+    print(f"\n🔗 Combined total: {len(combined_data)} entries")
+    return combined_data
 
 
-def standardize_date(date_str):
+def load_manifest(manifest_file, validated=False):
     """
-    Ensure date is in DD-MM-YYYY format
+    Load the incremental build manifest, or return an empty one
+
+    A manifest written with validation on cannot be reused with it off (and
+    the other way around), since the cached entries differ.
     """
-    if not date_str:
-        return date_str
+    empty = {"version": MANIFEST_VERSION, "validated": validated, "files": {}}
+    if not os.path.exists(manifest_file):
+        return empty
+    
+    try:
+        manifest = read_json(manifest_file)
+    except (OSError, JSONDecodeError) as e:
+        print(f"⚠️  Ignoring unreadable manifest {manifest_file}: {e}")
+        return empty
+    
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        print(f"⚠️  Manifest {manifest_file} is from another version, rebuilding")
+        return empty
     
-    parts = date_str.split('-')
-    if len(parts) == 3:
-        day, month, year = parts
-        return f"{day.zfill(2)}-{month.zfill(2)}-{year}"
+    if manifest.get("validated") != validated:
+        print(f"⚠️  Manifest {manifest_file} was built with validation "
+              f"{'on' if manifest.get('validated') else 'off'}, rebuilding")
+        return empty
     
-    return date_str
+    return manifest
 
 
-def clean_exam_data(exam_data):
+def combine_json_files_incremental(media_folder, manifest_file, workers=1, exclude=(),
+                                   report=None):
     """
-    Clean and standardize exam data
+    Combine and clean all JSON files, re-reading only files that changed
+
+    Each file's hash, cleaned entries and validation results are cached in
+    the manifest; returns the entries in sorted file order, or None.
     """
-    cleaned_data = []
+    json_files = find_json_files(media_folder, exclude)
     
-    for exam in exam_data:
-        cleaned_exam = {
-            "Dept.": exam.get("Dept.", exam.get("Department", "")).strip(),
-            "ID": exam.get("ID", exam.get("Course ID", "")).strip(),
-            "Course Title": exam.get("Course Title", "").strip(),
-            "Tech. Int.": exam.get("Tech. Int.", "").strip(),
-            "Section": standardize_section_name(exam.get("Section", "")),
-            "Room No": str(exam.get("Room No", "")).strip(),
-            "Seat(s)": str(exam.get("Seat(s)", "")).strip(),
-            "Total": str(exam.get("Total", "")).strip() if exam.get("Total") else "",
-            "Date": standardize_date(exam.get("Date", "")),
-            "Time": exam.get("Time", "").strip(),
-            "Slot": exam.get("Slot", "").strip(),
-            "Syllabus": exam.get("Syllabus", "").strip(),
-            "Notes": exam.get("Notes", "").strip()
+    if not json_files:
+        print(f"❌ No JSON files found in {media_folder}")
+        return None
+    
+    validate = report is not None
+    manifest = load_manifest(manifest_file, validate)
+    previous = manifest["files"]
+    current = {}
+    changed = []
+    
+    for file_path in json_files:
+        filename = os.path.basename(file_path)
+        stat = os.stat(file_path)
+        entry = previous.get(filename)
+        
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            file_hash = entry["sha256"]
+        else:
+            file_hash = file_sha256(file_path)
+        
+        current[filename] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": file_hash,
+            "records": None,
+            "quarantined": [],
+            "warnings": [],
+            "error": None
         }
-        cleaned_data.append(cleaned_exam)
+        if entry and entry["sha256"] == file_hash:
+            current[filename]["records"] = [ExamRecord.from_dict(r) for r in entry["records"]]
+            current[filename]["quarantined"] = entry["quarantined"]
+            current[filename]["warnings"] = entry["warnings"]
+            current[filename]["error"] = entry["error"]
+        else:
+            changed.append(file_path)
+    
+    load = functools.partial(load_and_clean_file, validate=validate)
+    results = dict(zip(changed, map_files(load, changed, workers)))
+    cleaned_data = []
+    
+    print(f"📁 Found {len(json_files)} JSON files (incremental mode):")
+    for file_path in json_files:
+        filename = os.path.basename(file_path)
+        entry = current[filename]
+        
+        if file_path in results:
+            records, message, quarantined, warnings = results[file_path]
+            entry["records"] = records if records is not None else []
+            entry["quarantined"] = quarantined
+            entry["warnings"] = warnings
+            entry["error"] = None if records is not None else status_text(message)
+            print(message)
+        else:
+            print(f"   ♻️  {filename}: unchanged, {len(entry['records'])} cached entries")
+        
+        if report is not None:
+            report.add_file(file_path, len(entry["records"]) + len(entry["quarantined"]),
+                            entry["quarantined"], error=entry["error"],
+                            warnings=entry["warnings"])
+        cleaned_data.extend(entry["records"])
+    
+    reused = len(json_files) - len(changed)
+    removed = len(set(previous) - set(current))
+    print(f"\n🔗 Combined total: {len(cleaned_data)} entries "
+          f"({len(changed)} rebuilt, {reused} reused, {removed} removed)")
+    
+    with atomic_write(manifest_file, 'wb') as f:
+        f.write(dumps({"version": MANIFEST_VERSION, "validated": validate, "files": current},
+                      default=ExamRecord.to_dict))
     
     return cleaned_data
 
 
+def clean_exam_data(exam_data):
+    """
+    Clean and standardize exam data
+    """
+    return [clean_exam_record(exam) for exam in exam_data]
+
+
+def _clean_text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _clean_total(value):
+    return str(value).strip() if value else ""
+
+
+def _clean_section(value):
+    return standardize_section_name(_clean_text(value))
+
+
+def _clean_date(value):
+    return standardize_date("" if value is None else str(value))
+
+
+# ExamRecord attribute -> normalizer for make_record_cleaner(); others use _clean_text.
+# Values validation only warns about (null, numbers) are normalized to text.
+FIELD_NORMALIZERS = {
+    "section": _clean_section,
+    "total": _clean_total,
+    "date": _clean_date,
+}
+
+
+def make_record_cleaner(source_fields):
+    """
+    Compile a function cleaning one raw entry into an ExamRecord
+
+    source_fields maps output keys to the raw keys they are read from, in
+    priority order (see department_schema.py).
+    """
+    fields = tuple(
+        (tuple(source_fields.get(key, (key,))), FIELD_NORMALIZERS.get(attr, _clean_text))
+        for key, attr in ExamRecord.KEYS.items()
+    )
+    
+    def clean(exam):
+        values = []
+        for aliases, normalize in fields:
+            for alias in aliases:
+                if alias in exam:
+                    values.append(intern(normalize(exam[alias])))
+                    break
+            else:
+                values.append("")
+        return ExamRecord(*values)
+    
+    return clean
+
+
+# Cleans one entry of the single-routine layout into an ExamRecord; --config
+# builds compile the same cleaner from each department's sourceFields
+clean_exam_record = make_record_cleaner(LEGACY_SOURCE_FIELDS)
+
+
 def group_exams_by_date_and_course(exam_data):
     """
     Group exams by date and course for better display
+
+    Returns {date: {"ID-Section": CourseGroup}}, keeping the first record of
+    each course as its info and collecting a RoomAllocation per record.
     """
-    grouped = defaultdict(lambda: defaultdict(lambda: {
-        "course_info": None,
-        "rooms": []
-    }))
+    grouped = defaultdict(dict)
     
     for exam in exam_data:
-        date = exam["Date"]
-        course_key = f"{exam['ID']}-{exam['Section']}"
+        courses = grouped[exam.date]
+        course_key = f"{exam.course_id}-{exam.section}"
         
-        # Store course information
-        if grouped[date][course_key]["course_info"] is None:
-            grouped[date][course_key]["course_info"] = {
-                "Dept.": exam["Dept."],
-                "ID": exam["ID"],
-                "Course Title": exam["Course Title"],
-                "Tech. Int.": exam["Tech. Int."],
-                "Section": exam["Section"],
-                "Date": exam["Date"],
-                "Total": exam["Total"] or "",
-                "Time": exam["Time"],
-                "Slot": exam["Slot"],
-                "Syllabus": exam["Syllabus"],
-                "Notes": exam["Notes"]
-            }
+        group = courses.get(course_key)
+        if group is None:
+            group = courses[course_key] = CourseGroup(exam)
         
         # Add room information
-        grouped[date][course_key]["rooms"].append({
-            "Room No": exam["Room No"],
-            "Seat(s)": exam["Seat(s)"]
-        })
+        group.rooms.append(RoomAllocation(exam.room_no, exam.seats))
         
         # Update total if current exam has total and stored total is empty
-        if exam["Total"] and not grouped[date][course_key]["course_info"]["Total"]:
-            grouped[date][course_key]["course_info"]["Total"] = exam["Total"]
+        if exam.total and not group.total:
+            group.total = exam.total
     
     return grouped
 
 
-def convert_to_flat_array(grouped_data):
+def sorted_group_dates(grouped_data):
     """
-    Convert grouped data back to flat array for website compatibility
+    Return the dates of the grouped data in output order
     """
-    result = []
-    
     # Sort dates, handling empty dates
     valid_dates = [date for date in grouped_data.keys() if date and date.strip()]
-    sorted_dates = sorted(valid_dates, key=lambda x: datetime.strptime(x, "%d-%m-%Y"))
+    sorted_dates = sorted(valid_dates, key=date_sort_key)
     
     # Add any entries with empty dates at the end
     empty_date_key = ""
     if empty_date_key in grouped_data:
         sorted_dates.append(empty_date_key)
     
-    for date in sorted_dates:
-        courses = grouped_data[date]
-        for course_key, course_data in courses.items():
-            course_info = course_data["course_info"]
-            rooms = course_data["rooms"]
+    return sorted_dates
+
+
+def iter_flat_records(grouped_data, every_room=False):
+    """
+    Yield the grouped data as flat per-room ExamRecords, sorted by date
+
+    every_room=True repeats the course's total, time, slot, syllabus and
+    notes on every room instead of only the first one.
+    """
+    for date in sorted_group_dates(grouped_data):
+        for group in grouped_data[date].values():
+            info = group.info
             
-            # Create one entry per room for compatibility
-            for i, room in enumerate(rooms):
-                result.append({
-                    "Dept.": course_info["Dept."],
-                    "ID": course_info["ID"],
-                    "Course Title": course_info["Course Title"],
-                    "Tech. Int.": course_info["Tech. Int."],
-                    "Section": course_info["Section"],
-                    "Room No": room["Room No"],
-                    "Seat(s)": room["Seat(s)"],
-                    "Total": course_info["Total"] if i == 0 else "",  # Only show total on first room
-                    "Date": course_info["Date"],
-                    "Time": course_info["Time"] if i == 0 else "",  # Only show time on first room
-                    "Slot": course_info["Slot"] if i == 0 else "",   # Only show slot on first room
-                    "Syllabus": course_info["Syllabus"] if i == 0 else "",  # Only show syllabus on first room
-                    "Notes": course_info["Notes"] if i == 0 else ""         # Only show notes on first room
+            # Create one entry per room for compatibility; total, time, slot,
+            # syllabus and notes are only shown on the first room
+            for i, room in enumerate(group.rooms):
+                first = every_room or i == 0
+                yield ExamRecord(
+                    info.dept, info.course_id, info.title, info.teacher, info.section,
+                    room.room_no, room.seats,
+                    group.total if first else "",
+                    info.date,
+                    info.time if first else "",
+                    info.slot if first else "",
+                    info.syllabus if first else "",
+                    info.notes if first else ""
+                )
+
+
+def convert_to_flat_array(grouped_data):
+    """
+    Convert grouped data back to flat array for website compatibility
+
+    Entries are ExamRecords; call to_dict() to serialize.
+    """
+    return list(iter_flat_records(grouped_data))
+
+
+class FlatRecordView:
+    """
+    Re-iterable, sized view of grouped data as flat entries
+
+    Lets get_statistics() run over streamed output without materializing
+    the flat array.
+    """
+    
+    def __init__(self, grouped_data):
+        self.grouped_data = grouped_data
+    
+    def __iter__(self):
+        return iter_flat_records(self.grouped_data)
+    
+    def __len__(self):
+        return sum(len(group.rooms)
+                   for courses in self.grouped_data.values()
+                   for group in courses.values())
+
+
+def iter_json_records(media_folder, exclude=(), report=None):
+    """
+    Stream exam entries from every input file, validating them into report if given
+
+    Returns None when there is no input.
+    """
+    json_files = find_json_files(media_folder, exclude)
+    
+    if not json_files:
+        print(f"❌ No JSON files found in {media_folder}")
+        return None
+    
+    print(f"📁 Found {len(json_files)} JSON files to stream:")
+    
+    validator = default_validator() if report is not None else None
+    
+    def records():
+        for file_path in json_files:
+            filename = os.path.basename(file_path)
+            count = 0
+            quarantined = []
+            warnings = []
+            message = None
+            try:
+                for exam in iter_json_array(file_path):
+                    count += 1
+                    if validator is not None:
+                        problems = validator.check(exam)
+                        if problems:
+                            row = problem_row(count - 1, exam, problems)
+                            if validator.is_fatal(problems):
+                                quarantined.append(row)
+                                continue
+                            warnings.append(row)
+                    yield exam
+                print(f"   ✅ {filename}: {count} entries")
+            except NotAJSONArray:
+                message = f"   ⚠️  {filename}: Not a list, skipping"
+            except JSONDecodeError as e:
+                message = f"   ❌ {filename}: JSON decode error after {count} entries - {e}"
+            except Exception as e:
+                message = f"   ❌ {filename}: Error after {count} entries - {e}"
+            if message:
+                print(message)
+            if report is not None:
+                report.add_file(file_path, count, quarantined,
+                                error=message and status_text(message), warnings=warnings)
+    
+    return records()
+
+
+def build_search_index(exam_data):
+    """
+    Build the website's filter/search index over the processed entries
+
+    Maps batch, section, date, course ID and teacher to entry offsets, plus
+    one search string per entry for filterData() in script.js.
+    """
+    maps = {name: defaultdict(list) for name in ("batch", "section", "date", "course", "teacher")}
+    tokens = []
+    
+    for offset, exam in enumerate(exam_data):
+        batch = extract_batch(exam.section)
+        for name, value in (("batch", batch), ("section", exam.section), ("date", exam.date),
+                            ("course", exam.course_id), ("teacher", exam.teacher)):
+            if value:
+                maps[name][value].append(offset)
+        
+        tokens.append("\n".join((exam.title, exam.course_id, exam.teacher, exam.section,
+                                  batch, f"batch {batch}")).lower())
+    
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "count": len(tokens),
+        **{name: dict(values) for name, values in maps.items()},
+        "tokens": tokens
+    }
+
+
+def write_shards(exam_data, shard_dir):
+    """
+    Write the entries split by date and by batch, plus a manifest; returns the manifest
+
+    Rows with an invalid date go to date/unknown.json; stale shards are removed.
+    """
+    shards = {"date": defaultdict(list), "batch": defaultdict(list)}
+    total = 0
+    
+    for exam in exam_data:
+        entry = exam.to_dict()
+        total += 1
+        if exam.date:
+            date = exam.date if date_ordinal(exam.date) is not None else UNKNOWN_DATE_SHARD
+            shards["date"][date].append(entry)
+        batch = extract_batch(exam.section)
+        if batch:
+            shards["batch"][batch].append(entry)
+    
+    manifest = {"version": SHARD_MANIFEST_VERSION, "total": total}
+    
+    for kind, groups in shards.items():
+        kind_dir = os.path.join(shard_dir, kind)
+        os.makedirs(kind_dir, exist_ok=True)
+        
+        listing = {}
+        for key, entries in groups.items():
+            filename = f"{key}.json"
+            content = dumps(entries)
+            with atomic_write(os.path.join(kind_dir, filename), 'wb', skip_unchanged=True) as f:
+                f.write(content)
+            listing[key] = {
+                "file": f"{kind}/{filename}",
+                "count": len(entries),
+                "sha256": hashlib.sha256(content).hexdigest()
+            }
+        
+        # Drop shards for dates/batches that no longer exist
+        for stale in glob.glob(os.path.join(kind_dir, "*.json")):
+            if os.path.basename(stale)[:-len(".json")] not in listing:
+                os.remove(stale)
+        
+        manifest[kind] = dict(sorted(listing.items()))
+    
+    write_json_file(os.path.join(shard_dir, "manifest.json"), manifest)
+    
+    return manifest
+
+
+def build_columnar(exam_data):
+    """
+    Encode the processed entries as dictionary-coded columns (distinct values + codes)
+    """
+    fields = list(ExamRecord.KEYS)
+    attrs = list(ExamRecord.KEYS.values())
+    lookups = [{} for _ in fields]
+    dicts = [[] for _ in fields]
+    codes = [[] for _ in fields]
+    count = 0
+    
+    for exam in exam_data:
+        count += 1
+        for attr, lookup, values, column in zip(attrs, lookups, dicts, codes):
+            value = getattr(exam, attr)
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(values)
+                values.append(value)
+            column.append(code)
+    
+    return {
+        "version": COLUMNAR_VERSION,
+        "count": count,
+        "fields": fields,
+        "dicts": dicts,
+        "codes": codes
+    }
+
+
+def _session_start(group):
+    """
+    Sort key placing a course group by its start time; unparseable times go last
+    """
+    minutes = parse_time_range(group.info.time)
+    return (0, minutes[0]) if minutes else (1, 0)
+
+
+def build_sessions(grouped_data):
+    """
+    Encode the grouped data as one session per course section and date, with its rooms
+    """
+    room_keys = ("Room No", "Seat(s)")
+    sessions = []
+    
+    for date in sorted_group_dates(grouped_data):
+        for group in sorted(grouped_data[date].values(), key=_session_start):
+            session = {key: value for key, value in group.info.to_dict().items()
+                       if key not in room_keys}
+            session["Total"] = group.total
+            
+            rooms = []
+            seen = set()
+            for room in group.rooms:
+                if room.room_no in seen:
+                    continue
+                seen.add(room.room_no)
+                rooms.append({"Room No": room.room_no, "Seat(s)": room.seats})
+            session["rooms"] = rooms
+            sessions.append(session)
+    
+    return {
+        "version": SESSIONS_VERSION,
+        "count": len(sessions),
+        "sessions": sessions
+    }
+
+
+def _as_count(value):
+    """
+    Return a seat/total string as an int, or None when it is not a whole number
+    """
+    # isdecimal(), unlike isdigit(), rejects digits int() cannot parse ("²")
+    return int(value) if value.isdecimal() else None
+
+
+def find_conflicts(grouped_data):
+    """
+    Report room overlaps, duplicate rooms, section clashes, seat mismatches and room use
+    """
+    by_room = defaultdict(list)
+    by_section = defaultdict(set)
+    seat_mismatches = []
+    
+    for date in sorted(grouped_data, key=date_sort_key):
+        for group in grouped_data[date].values():
+            info = group.info
+            slot = info.slot or info.time
+            course = f"{info.course_id}-{info.section}"
+            by_section[(date, slot, info.section)].add(info.course_id)
+            
+            allocated = 0
+            for room in group.rooms:
+                seats = _as_count(room.seats)
+                allocated += seats or 0
+                if room.room_no:
+                    by_room[(date, slot, room.room_no)].append((course, info.time, seats or 0))
+            
+            total = _as_count(group.total)
+            if total is not None and total != allocated:
+                seat_mismatches.append({
+                    "date": date,
+                    "course": info.course_id,
+                    "section": info.section,
+                    "total": total,
+                    "allocated": allocated
                 })
     
+    duplicate_allocations = []
+    utilization = defaultdict(lambda: {"sessions": 0, "shared_sessions": 0, "seats": 0,
+                                       "peak_seats": 0, "courses": 0})
+    sessions_by_day = defaultdict(list)
+    
+    for (date, slot, room_no), bookings in by_room.items():
+        courses = Counter(course for course, _, _ in bookings)
+        for course, count in courses.items():
+            if count > 1:
+                duplicate_allocations.append({"date": date, "slot": slot, "room": room_no,
+                                              "course": course, "count": count})
+        
+        seats = sum(seats for _, _, seats in bookings)
+        usage = utilization[room_no]
+        usage["sessions"] += 1
+        usage["shared_sessions"] += len(courses) > 1
+        usage["seats"] += seats
+        usage["peak_seats"] = max(usage["peak_seats"], seats)
+        usage["courses"] += len(courses)
+        
+        # The first booking with a parseable time places the session in the day
+        times = next((minutes for minutes in map(parse_time_range, (t for _, t, _ in bookings))
+                      if minutes), None)
+        if times:
+            sessions_by_day[(date, room_no)].append((times, slot, sorted(courses)))
+    
+    room_overlaps = []
+    for (date, room_no), sessions in sessions_by_day.items():
+        sessions.sort()
+        # A long session can overlap several later ones, not just the next
+        latest = sessions[0]
+        for session in sessions[1:]:
+            current, slot, courses = session
+            if current[0] < latest[0][1]:
+                room_overlaps.append({
+                    "date": date,
+                    "room": room_no,
+                    "sessions": [
+                        {"slot": latest[1], "courses": latest[2]},
+                        {"slot": slot, "courses": courses}
+                    ]
+                })
+            if current[1] > latest[0][1]:
+                latest = session
+    
+    section_clashes = [
+        {"date": date, "slot": slot, "section": section, "courses": sorted(course_ids)}
+        for (date, slot, section), course_ids in by_section.items()
+        if section and len(course_ids) > 1
+    ]
+    
+    return {
+        "counts": {
+            "room_overlaps": len(room_overlaps),
+            "duplicate_allocations": len(duplicate_allocations),
+            "section_clashes": len(section_clashes),
+            "seat_mismatches": len(seat_mismatches)
+        },
+        "room_overlaps": room_overlaps,
+        "duplicate_allocations": duplicate_allocations,
+        "section_clashes": section_clashes,
+        "seat_mismatches": seat_mismatches,
+        "room_utilization": dict(sorted(utilization.items()))
+    }
+
+
+def build_delta(old_rows, new_rows):
+    """
+    Describe how to turn one version of the processed routine into the next
+
+    Rows are matched on DELTA_KEY_FIELDS; apply_delta() (or applyDelta() in
+    script.js) rebuilds new_rows exactly.
+    """
+    old_keys = [tuple(row.get(field) for field in DELTA_KEY_FIELDS) for row in old_rows]
+    new_keys = [tuple(row.get(field) for field in DELTA_KEY_FIELDS) for row in new_rows]
+    removed = []
+    added = []
+    changed = []
+    
+    matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            changed.extend([j, new_rows[j]] for i, j in zip(range(i1, i2), range(j1, j2))
+                           if old_rows[i] != new_rows[j])
+        else:
+            removed.extend(range(i1, i2))
+            added.extend([j, new_rows[j]] for j in range(j1, j2))
+    
+    return {
+        "version": DELTA_VERSION,
+        "count": len(new_rows),
+        "removed": removed,
+        "added": added,
+        "changed": changed
+    }
+
+
+def apply_delta(rows, delta):
+    """
+    Return the rows of the next version from a build_delta() result
+    """
+    removed = set(delta["removed"])
+    result = [row for index, row in enumerate(rows) if index not in removed]
+    for index, row in delta["added"]:
+        result.insert(index, row)
+    for index, row in delta["changed"]:
+        result[index] = row
+    if len(result) != delta["count"]:
+        raise ValueError(f"delta expects {delta['count']} rows, got {len(result)}")
     return result
 
 
+def read_previous_routine(output_file):
+    """
+    Return (rows, SHA-256) of the routine currently at output_file, or (None, None)
+    """
+    try:
+        return read_json(output_file), file_sha256(output_file)
+    except (OSError, JSONDecodeError):
+        return None, None
+
+
+def update_version_chain(previous_summary, previous_rows, previous_hash, new_rows,
+                         content_hash, updated, deltas_dir):
+    """
+    Extend the summary's version chain, writing the delta from the previous version
+
+    Returns (chain, delta written or None).
+    """
+    chain = previous_summary.get("versions") or []
+    version = content_hash[:16]
+    if chain and chain[-1]["hash"] == version:
+        return chain, None
+    
+    if previous_hash is None or not chain or chain[-1]["hash"] != previous_hash[:16]:
+        chain = []
+        if previous_hash is not None:
+            chain.append({"hash": previous_hash[:16],
+                          "updated": previous_summary.get("last_updated"),
+                          "count": len(previous_rows), "delta": None})
+    
+    # When the routine on disk already is this version (e.g. the first run
+    # with --deltas on an unchanged routine), it starts the chain on its own
+    delta = None
+    if not chain or chain[-1]["hash"] != version:
+        entry = {"hash": version, "updated": updated, "count": len(new_rows), "delta": None}
+        if chain:
+            delta = build_delta(previous_rows, new_rows)
+            delta["from"] = chain[-1]["hash"]
+            delta["to"] = version
+            os.makedirs(deltas_dir, exist_ok=True)
+            delta_file = os.path.join(deltas_dir, f"{delta['from']}_{version}.json")
+            write_json_file(delta_file, delta)
+            entry["delta"] = f"{os.path.basename(deltas_dir)}/{os.path.basename(delta_file)}"
+        chain = [*chain, entry][-DELTA_HISTORY:]
+    
+    # Drop deltas that fell off the chain
+    if os.path.isdir(deltas_dir):
+        keep = {os.path.basename(item["delta"]) for item in chain if item["delta"]}
+        for stale in glob.glob(os.path.join(deltas_dir, "*.json")):
+            if os.path.basename(stale) not in keep:
+                os.remove(stale)
+    
+    return chain, delta
+
+
+def write_precompressed(file_path, skip_existing=False):
+    """
+    Write .gz (and .br when brotli is installed) siblings of a file
+
+    skip_existing=True keeps siblings that already exist. Returns the files written.
+    """
+    targets = [(file_path + '.gz', lambda content: gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        targets.append((file_path + '.br', lambda content: brotli.compress(content, quality=11)))
+    if skip_existing:
+        targets = [(target, compress) for target, compress in targets
+                   if not os.path.exists(target)]
+    if not targets:
+        return []
+    
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    
+    written = []
+    for target, compress in targets:
+        # gzip mtime=0 keeps the bytes identical for identical input
+        with atomic_write(target, 'wb', skip_unchanged=True) as f:
+            f.write(compress(content))
+        written.append(target)
+    
+    return written
+
+
 def get_statistics(exam_data):
     """
     Generate statistics about the exam data
+
+    A single pass through RoutineStatistics; see its summary() for the keys.
+    """
+    return RoutineStatistics().update(exam_data).summary()
+
+
+def write_json_file(file_path, data, pretty=False):
+    """
+    Write data as JSON, leaving file_path untouched if its bytes would not change
+
+    Output is compact unless pretty=True. Returns the AtomicWrite, whose
+    changed and sha256 describe the result.
     """
-    unique_sections = sorted(list(set(exam["Section"] for exam in exam_data)))
-    unique_courses = sorted(list(set(exam["ID"] for exam in exam_data)))
-    unique_departments = sorted(list(set(exam["Dept."] for exam in exam_data)))
+    output = atomic_write(file_path, 'wb', skip_unchanged=True)
+    with output as f:
+        f.write(dumps(data, pretty))
+    return output
+
+
+def previous_row_count(output_file):
+    """
+    Return the number of rows in the routine at output_file, or None if there is none
+    """
+    try:
+        rows = read_json(output_file)
+    except (OSError, JSONDecodeError):
+        return None
+    return len(rows) if isinstance(rows, list) else None
+
+
+def read_previous_summary(summary_file):
+    """
+    Return the summary written by the last build, or {} if there is none
+    """
+    try:
+        summary = read_json(summary_file)
+    except (OSError, JSONDecodeError):
+        return {}
+    return summary if isinstance(summary, dict) else {}
+
+
+def publish_routine(cleaned_data, output_file, input_folder, options, stream=False,
+                    profiler=None, stage_prefix="", summary_extra=None, validation=None):
+    """
+    Group cleaned records and write the routine and the files options ask for
+    """
+    if profiler is None:
+        profiler = StageProfiler(enabled=False)
     
-    # Filter out empty dates for statistics
-    valid_dates = [exam["Date"] for exam in exam_data if exam["Date"] and exam["Date"].strip()]
-    unique_dates = sorted(list(set(valid_dates)), 
-                         key=lambda x: datetime.strptime(x, "%d-%m-%Y"))
+    if not stream:
+        print(f"🧹 Cleaned data: {len(cleaned_data)} entries")
     
-    # Count entries per section
-    section_counts = defaultdict(int)
-    for exam in exam_data:
-        section_counts[exam["Section"]] += 1
+    # Group by date and course, then convert back to flat array
+    with profiler.stage(stage_prefix + ("load+clean+group" if stream else "group"),
+                        None if stream else len(cleaned_data)) as stage:
+        grouped_data = group_exams_by_date_and_course(cleaned_data)
+        stage.records_out = sum(len(courses) for courses in grouped_data.values())
     
-    return {
-        "total_entries": len(exam_data),
-        "unique_courses": len(unique_courses),
-        "unique_sections": len(unique_sections),
-        "unique_departments": unique_departments,
-        "date_range": {
-            "start": unique_dates[0] if unique_dates else "",
-            "end": unique_dates[-1] if unique_dates else "",
-            "total_days": len(unique_dates)
-        },
-        "sections": unique_sections,
-        "section_counts": dict(section_counts),
-        "courses": unique_courses
+    with profiler.stage(stage_prefix + "flatten", stage.records_out) as stage:
+        if stream:
+            processed_data = FlatRecordView(grouped_data)
+        else:
+            processed_data = convert_to_flat_array(grouped_data)
+        stage.records_out = len(processed_data)
+    print(f"🔄 Processed data: {len(processed_data)} entries")
+    
+    # Create output directory if it doesn't exist
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    # Keep the version being replaced to diff against
+    if options.deltas:
+        previous_rows, previous_hash = read_previous_routine(output_file)
+    
+    # Write the processed data, collecting statistics on the way
+    statistics = RoutineStatistics()
+    written = {}
+    with profiler.stage(stage_prefix + "write", len(processed_data)):
+        written[output_file] = atomic_write(output_file, 'wb', skip_unchanged=True)
+        with written[output_file] as f:
+            records = statistics.observe(processed_data)
+            if stream:
+                with JsonArrayWriter(f, options.pretty) as writer:
+                    writer.write_all(record.to_dict() for record in records)
+            else:
+                f.write(dumps([record.to_dict() for record in records], options.pretty))
+    
+    # An unchanged routine keeps its timestamps, so the summary and calendar
+    # bytes, and with them their ETags, stay the same
+    summary_file = output_file.replace('.json', '_summary.json')
+    content_hash = written[output_file].sha256
+    previous = read_previous_summary(summary_file)
+    if previous.get("content_hash") == content_hash:
+        last_updated = previous.get("last_updated")
+        processed_at = previous.get("processed_at")
+    else:
+        now = datetime.now()
+        last_updated = now.isoformat()
+        processed_at = now.strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Record how to get from the previous version to this one
+    if options.deltas:
+        deltas_dir = output_file.replace('.json', '_deltas')
+        with profiler.stage(stage_prefix + "deltas", len(processed_data)):
+            versions, delta = update_version_chain(
+                previous, previous_rows, previous_hash,
+                [record.to_dict() for record in processed_data],
+                content_hash, last_updated, deltas_dir)
+    
+    # Write the search index the website uses for filtering
+    with profiler.stage(stage_prefix + "index", len(processed_data)):
+        index_file = output_file.replace('.json', '_index.json')
+        written[index_file] = write_json_file(index_file, build_search_index(processed_data))
+    
+    # Write the compact columnar variant the website prefers when present
+    site_files = [output_file, index_file]
+    if options.columnar:
+        with profiler.stage(stage_prefix + "columnar", len(processed_data)):
+            columnar_file = output_file.replace('.json', '_columns.json')
+            written[columnar_file] = write_json_file(columnar_file, build_columnar(processed_data))
+        site_files.append(columnar_file)
+    
+    # Write the course sessions the website renders without regrouping
+    if options.sessions or options.section_files:
+        with profiler.stage(stage_prefix + "sessions", len(processed_data)) as stage:
+            session_data = build_sessions(grouped_data)
+            stage.records_out = session_data["count"]
+    if options.sessions:
+        sessions_file = output_file.replace('.json', '_sessions.json')
+        written[sessions_file] = write_json_file(sessions_file, session_data)
+        site_files.append(sessions_file)
+    
+    # Write each section's own routine and calendar
+    if options.section_files:
+        sections_dir = output_file.replace('.json', '_sections')
+        stamp = (datetime.fromisoformat(last_updated).astimezone(timezone.utc)
+                 .strftime("%Y%m%dT%H%M%SZ"))
+        with profiler.stage(stage_prefix + "sections", session_data["count"]) as stage:
+            section_index, sections_changed = write_section_routines(
+                session_data["sessions"], sections_dir, stamp, workers=options.workers)
+            stage.records_out = len(section_index["sections"])
+        sections_index_file = os.path.join(sections_dir, "index.json")
+    
+    if options.precompress:
+        with profiler.stage(stage_prefix + "precompress"):
+            for site_file in site_files:
+                write_precompressed(site_file, skip_existing=not written[site_file].changed)
+    
+    # Write per-date and per-batch shards for partial loading
+    if options.shards:
+        shard_dir = output_file.replace('.json', '_shards')
+        with profiler.stage(stage_prefix + "shards", len(processed_data)):
+            shard_manifest = write_shards(processed_data, shard_dir)
+        manifest_file = os.path.join(shard_dir, "manifest.json")
+    
+    # Check rooms, sections and seat totals for conflicts
+    with profiler.stage(stage_prefix + "conflicts", len(processed_data)) as stage:
+        conflicts = find_conflicts(grouped_data)
+        stage.records_out = sum(conflicts["counts"].values())
+        conflicts_file = output_file.replace('.json', '_conflicts.json')
+        written[conflicts_file] = write_json_file(conflicts_file, conflicts, pretty=True)
+    
+    # Write the validation report with every quarantined and warned row
+    if validation is not None:
+        validation_file = output_file.replace('.json', '_validation.json')
+        written[validation_file] = write_json_file(validation_file, validation.to_dict(), pretty=True)
+    
+    # Bulk-load the records into the SQLite database for indexed lookups
+    if options.database:
+        routine = os.path.splitext(os.path.basename(output_file))[0]
+        with profiler.stage(stage_prefix + "sqlite", len(processed_data)):
+            # Every row needs its time to sort and answer lookups on its own
+            exported = export_routine(options.database,
+                                      iter_flat_records(grouped_data, every_room=True), routine,
+                                      department=(summary_extra or {}).get("department", ""),
+                                      content_hash=written[output_file].sha256)
+    
+    # Generate and display statistics
+    with profiler.stage(stage_prefix + "statistics", statistics.total):
+        stats = statistics.summary()
+    
+    print("\n✅ Processing Complete!")
+    print("=" * 50)
+    print("📈 Statistics:")
+    print(f"   • Total entries: {stats['total_entries']}")
+    print(f"   • Unique courses: {stats['unique_courses']}")
+    print(f"   • Unique sections: {stats['unique_sections']}")
+    print(f"   • Departments: {', '.join(stats['unique_departments'])}")
+    print(f"   • Date range: {stats['date_range']['start']} to {stats['date_range']['end']}")
+    print(f"   • Total exam days: {stats['date_range']['total_days']}")
+    
+    print("\n📝 Sections found:")
+    for section in stats['sections']:
+        count = stats['section_counts'][section]
+        print(f"   • {section}: {count} entries")
+    
+    print(f"\n💾 Processed data saved to: {output_file}")
+    
+    # Create summary file
+    file_hashes = {path: output.sha256 for path, output in written.items()}
+    if options.shards:
+        file_hashes[manifest_file] = file_sha256(manifest_file)
+    if options.section_files:
+        file_hashes[sections_index_file] = file_sha256(sections_index_file)
+    base_dir = output_dir or "."
+    
+    summary_data = {
+        **stats,
+        "last_updated": last_updated,
+        "processed_at": processed_at,
+        "input_folder": input_folder,
+        "output_file": output_file,
+        **(summary_extra or {})
     }
+    summary_data["content_hash"] = content_hash
+    summary_data["etag"] = f'"{content_hash[:16]}"'
+    summary_data["files"] = {
+        os.path.relpath(path, base_dir).replace(os.sep, "/"): sha256
+        for path, sha256 in sorted(file_hashes.items())
+    }
+    if options.deltas:
+        summary_data["versions"] = versions
+    summary_data["conflicts"] = conflicts["counts"]
+    if validation is not None:
+        summary_data["validation"] = validation.summary()
+    if profiler.enabled:
+        summary_data["profile"] = profiler.report()
+    
+    written[summary_file] = write_json_file(summary_file, summary_data, pretty=True)
+    
+    print(f"📋 Summary saved to: {summary_file}")
+    print(f"🔎 Search index saved to: {index_file}")
+    if validation is not None:
+        validation.print_summary()
+        print(f"🛡️  Validation report saved to: {validation_file}")
+    counts = conflicts["counts"]
+    print(f"\n🚦 Conflicts: {counts['room_overlaps']} room overlaps, "
+          f"{counts['duplicate_allocations']} duplicate room allocations, "
+          f"{counts['section_clashes']} section clashes, "
+          f"{counts['seat_mismatches']} seat mismatches")
+    print(f"🚦 Conflict report saved to: {conflicts_file}")
+    if options.columnar:
+        print(f"🗜️  Columnar data saved to: {columnar_file}")
+    if options.sessions:
+        print(f"🗂️  {session_data['count']} sessions saved to: {sessions_file}")
+    if options.section_files:
+        print(f"🧑‍🎓 {len(section_index['sections'])} section routines and calendars "
+              f"({sections_changed} changed) saved to: {sections_dir}")
+    if options.deltas:
+        if delta is not None:
+            print(f"🔁 Delta from the previous version: {len(delta['added'])} added, "
+                  f"{len(delta['removed'])} removed, {len(delta['changed'])} changed "
+                  f"({len(versions)} versions kept in {deltas_dir})")
+        elif not written[output_file].changed:
+            print(f"🔁 Routine unchanged; {len(versions)} versions kept")
+        else:
+            print(f"🔁 No previous version to diff against; {len(versions)} versions kept")
+    if options.database:
+        if exported is None:
+            print(f"🗄️  SQLite database already up to date: {options.database}")
+        else:
+            print(f"🗄️  {exported} entries exported to SQLite database: {options.database}")
+    if options.precompress:
+        print(f"📦 Precompressed {'gzip/brotli' if brotli else 'gzip'} copies written")
+    if options.shards:
+        print(f"🧩 {len(shard_manifest['date'])} date and {len(shard_manifest['batch'])} batch "
+              f"shards saved to: {shard_dir}")
+    unchanged = sum(1 for output in written.values() if not output.changed)
+    if unchanged:
+        print(f"♻️  {unchanged} of {len(written)} files unchanged and left untouched")
+    
+    return True
 
 
-def process_exam_routine(media_folder, output_file):
+def process_exam_routine(media_folder, output_file, options=None, incremental=False,
+                         stream=False, exclude_output=False, profiler=None):
     """
-    Main processing function - now combines all JSON files first
+    Main processing function - combines all JSON files in media_folder into output_file
+
+    incremental reuses unchanged files' cleaned entries from a manifest, stream
+    reads and writes one entry at a time, and exclude_output never reads
+    output_file back as input.
     """
+    if options is None:
+        options = BuildOptions()
+    if profiler is None:
+        profiler = StageProfiler(enabled=False)
+    exclude = (output_file,) if exclude_output else ()
+    report = ValidationReport() if options.validate else None
+    
     try:
         print("📚 Processing DIU Exam Routine Data...")
         print("=" * 50)
         
-        # Combine all JSON files in the media folder
-        exam_data = combine_json_files(media_folder)
-        
-        if exam_data is None:
-            return False
-        
-        print(f"\n📊 Combined data: {len(exam_data)} entries")
-        
-        # Clean and standardize the data
-        cleaned_data = clean_exam_data(exam_data)
-        print(f"🧹 Cleaned data: {len(cleaned_data)} entries")
+        if incremental:
+            # Reuse cached per-file results; only changed files are cleaned
+            manifest_file = output_file.replace('.json', '_manifest.json')
+            with profiler.stage("load+clean") as stage:
+                cleaned_data = combine_json_files_incremental(media_folder, manifest_file,
+                                                              options.workers, exclude, report)
+                stage.records_out = len(cleaned_data) if cleaned_data is not None else None
+            
+            if cleaned_data is None:
+                return False
+        elif stream:
+            # Parse and clean lazily; entries flow straight into grouping
+            exam_data = iter_json_records(media_folder, exclude, report)
+            
+            if exam_data is None:
+                return False
+            
+            cleaned_data = (clean_exam_record(exam) for exam in exam_data)
+        elif options.workers > 1:
+            # Parse and clean each file in a worker process
+            with profiler.stage("load+clean") as stage:
+                cleaned_data = combine_and_clean_parallel(media_folder, options.workers, exclude,
+                                                          report)
+                stage.records_out = len(cleaned_data) if cleaned_data is not None else None
+            
+            if cleaned_data is None:
+                return False
+        else:
+            # Combine all JSON files in the media folder
+            with profiler.stage("load") as stage:
+                exam_data = combine_json_files(media_folder, exclude, report)
+                stage.records_out = len(exam_data) if exam_data is not None else None
+            
+            if exam_data is None:
+                return False
+            
+            print(f"\n📊 Combined data: {len(exam_data)} entries")
+            
+            # Clean and standardize the data
+            with profiler.stage("clean", len(exam_data)) as stage:
+                cleaned_data = clean_exam_data(exam_data)
+                stage.records_out = len(cleaned_data)
         
-        # Group by date and course, then convert back to flat array
-        grouped_data = group_exams_by_date_and_course(cleaned_data)
-        processed_data = convert_to_flat_array(grouped_data)
-        print(f"🔄 Processed data: {len(processed_data)} entries")
+        publish_routine(cleaned_data, output_file, media_folder, options, stream=stream,
+                        profiler=profiler, validation=report)
+        profiler.print_report()
+        print("\n🎯 Data is now ready for your website!")
         
-        # Create output directory if it doesn't exist
-        output_dir = os.path.dirname(output_file)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        return True
         
-        # Write the processed data
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"❌ Error processing exam routine: {str(e)}")
+        return False
+    finally:
+        profiler.stop()
+
+
+def process_departments(schema_file=DEFAULT_SCHEMA_FILE, only=None, options=None,
+                        profiler=None):
+    """
+    Build every department in the schema file (or those in only), parsing each input once
+
+    Nothing is written unless every department has inputs holding at least
+    MIN_ROW_FRACTION of the rows of the routine it replaces.
+    """
+    if options is None:
+        options = BuildOptions()
+    if profiler is None:
+        profiler = StageProfiler(enabled=False)
+    
+    try:
+        departments = load_departments(schema_file)
+    except SchemaError as e:
+        print(f"❌ Invalid department schema: {e}")
+        return False
+    
+    outputs = [department.output for department in departments]
+    if only:
+        unknown = set(only) - {department.key for department in departments}
+        if unknown:
+            print(f"❌ Unknown department(s) in {schema_file}: {', '.join(sorted(unknown))}")
+            return False
+        departments = [department for department in departments if department.key in only]
+    
+    try:
+        print(f"📚 Processing {len(departments)} department(s) from {schema_file}...")
+        print("=" * 50)
         
-        # Generate and display statistics
-        stats = get_statistics(processed_data)
+        inputs = {department.key: find_input_files(department.inputs, exclude=outputs)
+                  for department in departments}
+        json_files = sorted(set().union(*inputs.values()))
         
-        print("\n✅ Processing Complete!")
-        print("=" * 50)
-        print("📈 Statistics:")
-        print(f"   • Total entries: {stats['total_entries']}")
-        print(f"   • Unique courses: {stats['unique_courses']}")
-        print(f"   • Unique sections: {stats['unique_sections']}")
-        print(f"   • Departments: {', '.join(stats['unique_departments'])}")
-        print(f"   • Date range: {stats['date_range']['start']} to {stats['date_range']['end']}")
-        print(f"   • Total exam days: {stats['date_range']['total_days']}")
+        if not json_files:
+            print("❌ No JSON files found for any department")
+            return False
         
-        print("\n📝 Sections found:")
-        for section in stats['sections']:
-            count = stats['section_counts'][section]
-            print(f"   • {section}: {count} entries")
+        # Parse every distinct file once, whichever departments read it
+        print(f"📁 Found {len(json_files)} JSON files to parse ({options.workers} workers):")
+        with profiler.stage("load") as stage:
+            parsed = dict(zip(json_files, map_files(read_json_file, json_files, options.workers)))
+            stage.records_out = sum(len(data) for data, _ in parsed.values() if data is not None)
+        for file_path in json_files:
+            print(parsed[file_path][1])
         
-        print(f"\n💾 Processed data saved to: {output_file}")
+        # Check and clean every department before writing anything, so one
+        # department's missing inputs cannot leave the others half-replaced
+        builds = []
+        for department in departments:
+            print(f"\n🏛️  {department.name} ({department.key})")
+            print("=" * 50)
+            
+            department_files = inputs[department.key]
+            if not department_files:
+                print(f"❌ No JSON files found for {', '.join(department.inputs)}")
+                continue
+            
+            report = ValidationReport() if options.validate else None
+            validator = RecordValidator(ExamRecord.KEYS, department.source_fields)
+            exam_data = []
+            with profiler.stage(f"{department.key}:validate" if options.validate else
+                                f"{department.key}:combine") as stage:
+                for file_path in department_files:
+                    data, message = parsed[file_path]
+                    if data is None:
+                        if report is not None:
+                            report.add_file(file_path, 0, error=status_text(message))
+                        continue
+                    if report is not None:
+                        kept, quarantined, warnings = validator.split(data)
+                        report.add_file(file_path, len(data), quarantined, warnings=warnings)
+                        data = kept
+                    exam_data.extend(data)
+                stage.records_out = len(exam_data)
+            print(f"📊 Combined data: {len(exam_data)} entries from "
+                  f"{len(department_files)} files")
+            
+            previous_count = previous_row_count(department.output)
+            if previous_count and len(exam_data) < previous_count * MIN_ROW_FRACTION:
+                print(f"❌ Only {len(exam_data)} entries for the {previous_count} in "
+                      f"{department.output}; check the inputs, or delete it to publish "
+                      f"a smaller routine")
+                continue
+            
+            with profiler.stage(f"{department.key}:clean", len(exam_data)) as stage:
+                clean = make_record_cleaner(department.source_fields)
+                cleaned_data = [clean(exam) for exam in exam_data]
+                stage.records_out = len(cleaned_data)
+            builds.append((department, cleaned_data, report))
         
-        # Create summary file
-        summary_file = output_file.replace('.json', '_summary.json')
-        summary_data = {
-            **stats,
-            "last_updated": datetime.now().isoformat(),
-            "processed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "input_folder": media_folder,
-            "output_file": output_file
-        }
+        if len(builds) < len(departments):
+            print("\n❌ No department was written")
+            return False
         
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, indent=2, ensure_ascii=False)
+        for department, cleaned_data, report in builds:
+            print(f"\n📤 Publishing {department.name} ({department.key})")
+            print("=" * 50)
+            publish_routine(cleaned_data, department.output, ", ".join(department.inputs),
+                            options, profiler=profiler, stage_prefix=f"{department.key}:",
+                            summary_extra={"department": department.key,
+                                           "department_name": department.name},
+                            validation=report)
         
-        print(f"📋 Summary saved to: {summary_file}")
+        profiler.print_report()
         print("\n🎯 Data is now ready for your website!")
         
         return True
@@ -319,22 +1580,98 @@ def process_exam_routine(media_folder, output_file):
     except Exception as e:
         print(f"❌ Error processing exam routine: {str(e)}")
         return False
+    finally:
+        profiler.stop()
 
 
-def main():
+def build_parser():
+    """
+    Return the command line parser; watch_media.py adds its own options to it
+    """
+    parser = argparse.ArgumentParser(description="DIU Exam Routine Data Processor")
+    parser.add_argument("--media", default="media",
+                        help="folder containing the input JSON files (default: media)")
+    parser.add_argument("--output", default="media/cse_processed_exam_routine.json",
+                        help="processed output file")
+    parser.add_argument("--config", metavar="FILE", nargs="?", const=DEFAULT_SCHEMA_FILE,
+                        help="build every department in the shared schema file instead "
+                             f"(default: {DEFAULT_SCHEMA_FILE}); --media/--output are ignored")
+    parser.add_argument("--department", action="append", metavar="KEY",
+                        help="with --config, only build this department (repeatable)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-process input files that changed since the last run")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse, clean and write entries one at a time to bound memory use")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="parse and clean input files in N worker processes (default: 1)")
+    parser.add_argument("--shards", action="store_true",
+                        help="also write per-date and per-batch shards with a manifest")
+    parser.add_argument("--columnar", action="store_true",
+                        help="also write compact dictionary-coded columns (<output>_columns.json)")
+    parser.add_argument("--sessions", action="store_true",
+                        help="also write per-course sessions with their rooms (<output>_sessions.json)")
+    parser.add_argument("--section-routines", action="store_true",
+                        help="also write every section's routine and .ics calendar "
+                             "to <output>_sections/")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br if brotli is installed) copies of site-facing files")
+    parser.add_argument("--sqlite", metavar="FILE", nargs="?", const=DEFAULT_DATABASE,
+                        help="also bulk-load the routine into a SQLite database for "
+                             f"routine_db.py lookups (default: {DEFAULT_DATABASE})")
+    parser.add_argument("--deltas", action="store_true",
+                        help="also write a delta from the previous version to <output>_deltas/ "
+                             "so the website can patch its cached copy")
+    parser.add_argument("--pretty", action="store_true",
+                        help="indent the processed output for reading (default: compact)")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="skip record validation (rows missing required fields are kept "
+                             "instead of quarantined)")
+    parser.add_argument("--exclude-output", action="store_true",
+                        help="never read the output file back as input when it is in the media folder")
+    parser.add_argument("--profile", action="store_true",
+                        help="record per-stage time and memory, printed and saved in the summary")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="also run under cProfile and dump the stats to FILE")
+    return parser
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options
+    """
+    return build_parser().parse_args(argv)
+
+
+def make_build(args, profiler=None):
+    """
+    Return a function running the build parse_args() results describe
+    """
+    options = BuildOptions.from_args(args)
+    if args.config:
+        return functools.partial(process_departments, args.config, only=args.department,
+                                 options=options, profiler=profiler)
+    return functools.partial(process_exam_routine, args.media, args.output, options,
+                             incremental=args.incremental, stream=args.stream,
+                             exclude_output=args.exclude_output, profiler=profiler)
+
+
+def main(argv=None):
     """
     Main function to run the script
     """
+    args = parse_args(argv)
+    
     print("🎓 DIU Exam Routine Data Processor")
     print("=" * 50)
     
-    # Define paths
-    media_folder = "media"
-    output_file = "media/cse_processed_exam_routine.json"
+    profiler = StageProfiler(enabled=args.profile)
     
-    # Check if media folder exists
-    if not os.path.exists(media_folder):
-        print(f"❌ Media folder not found: {media_folder}")
+    if args.config:
+        if args.incremental or args.stream:
+            print("⚠️  --incremental and --stream do not apply to --config builds, ignoring them")
+    elif not os.path.exists(args.media):
+        # Check if media folder exists
+        print(f"❌ Media folder not found: {args.media}")
         print("\n📁 Please ensure the following file structure:")
         print("   media/")
         print("   ├── 01_7_2025.json")
@@ -343,7 +1680,15 @@ def main():
         return
     
     # Process the data
-    success = process_exam_routine(media_folder, output_file)
+    run = make_build(args, profiler)
+    
+    if args.cprofile:
+        profile = cProfile.Profile()
+        success = profile.runcall(run)
+        profile.dump_stats(args.cprofile)
+        print(f"\n🔬 cProfile stats saved to: {args.cprofile}")
+    else:
+        success = run()
     
     if success:
         print("\n🚀 Next steps:")
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Compiled validation for raw exam routine entries
+
+RecordValidator checks every field of an entry in one pass: value types,
+required fields, DD-MM-YYYY dates, "09:00 AM - 10:30 AM" time ranges and
+seat/total counts. The checks for each field are chosen once when the
+validator is built, and they test values with regexes and the cached
+normalizers instead of catching exceptions, so validating a row costs
+about as much as cleaning it.
+
+Only rows that cannot be used are quarantined: rows that are not objects
+and rows missing a required field (or holding something other than text
+in one). Every other problem, such as a seat count of "-L" or a malformed
+time, is a warning: the row is kept as the cleaners normalize it, so no
+student's exam disappears from the routine. null counts as an empty value.
+ValidationReport collects quarantined and warned rows per file together
+with file-level errors (unreadable JSON, not a list) for the
+*_validation.json report.
+"""
+
+import re
+from collections import Counter
+
+from normalizers import date_ordinal, parse_time_range, standardize_date
+
+# Fields that must be present and non-empty in every entry
+REQUIRED_KEYS = ("Course Title", "Section", "Date")
+
+# Upper bound for Seat(s) and Total
+MAX_COUNT = 5000
+
+_DATE = re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$')
+_COUNT = re.compile(r'^\s*\d+\s*$')
+
+
+def _type_error(value, expected):
+    return "type", f"expected {expected}, got {type(value).__name__}"
+
+
+def _check_text(value):
+    if value is not None and not isinstance(value, str):
+        return _type_error(value, "text")
+    return None
+
+
+def _check_date(value):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        return _type_error(value, "text")
+    if value and (not _DATE.match(value) or date_ordinal(standardize_date(value)) is None):
+        return "format", f"invalid date {value!r}, expected DD-MM-YYYY"
+    return None
+
+
+def _check_time(value):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        return _type_error(value, "text")
+    if not value.strip():
+        return None
+    minutes = parse_time_range(value)
+    if minutes is None:
+        return "format", f"invalid time {value!r}, expected e.g. 09:00 AM - 10:30 AM"
+    if minutes[0] >= minutes[1]:
+        return "range", f"time {value!r} ends before it starts"
+    return None
+
+
+def _count_checker(max_count):
+    def check_count(value):
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            return _type_error(value, "a whole number")
+        if isinstance(value, str):
+            if not value.strip():
+                return None
+            if not _COUNT.match(value):
+                return "format", f"{value!r} is not a whole number"
+            value = int(value)
+        if not 0 <= value <= max_count:
+            return "range", f"{value} is outside 0-{max_count}"
+        return None
+
+    return check_count
+
+
+def problem_row(index, entry, problems):
+    """
+    Return the report row for an entry at index in its file and its problems
+    """
+    return {
+        "index": index,
+        "errors": [{"field": field, "code": code, "message": message}
+                   for field, code, message in problems],
+        "entry": entry
+    }
+
+
+class RecordValidator:
+    """
+    Validate raw entries against the output keys they are cleaned into
+
+    keys are the output keys to check (ExamRecord.KEYS); source_fields maps
+    an output key to the raw keys it may be read from, as in
+    department_schema.py, so entries are checked in their raw shape.
+    """
+
+    def __init__(self, keys, source_fields=None, required=REQUIRED_KEYS, max_count=MAX_COUNT):
+        source_fields = source_fields or {}
+        self.required = frozenset(required)
+        special = {
+            "Date": _check_date,
+            "Time": _check_time,
+            "Seat(s)": _count_checker(max_count),
+            "Total": _count_checker(max_count),
+        }
+        self.fields = tuple(
+            (key, tuple(source_fields.get(key, (key,))), key in required,
+             special.get(key, _check_text))
+            for key in keys
+        )
+
+    def check(self, entry):
+        """
+        Return a list of (field, code, message) problems; empty when valid
+        """
+        if not isinstance(entry, dict):
+            return [(None, "type", f"expected an object, got {type(entry).__name__}")]
+
+        problems = []
+        for key, aliases, required, check in self.fields:
+            for alias in aliases:
+                if alias in entry:
+                    value = entry[alias]
+                    break
+            else:
+                if required:
+                    problems.append((key, "required", f"missing {key}"))
+                continue
+
+            problem = check(value)
+            if problem is not None:
+                problems.append((key, *problem))
+            elif required and not (value.strip() if isinstance(value, str) else value):
+                problems.append((key, "required", f"empty {key}"))
+        return problems
+
+    def is_fatal(self, problems):
+        """
+        True when check() found a problem that makes the entry unusable
+
+        That is an entry that is not an object, or a required field that is
+        missing, empty or not text; anything else is only a warning.
+        """
+        return any(field is None or code == "required"
+                   or (code == "type" and field in self.required)
+                   for field, code, _ in problems)
+
+    def split(self, entries):
+        """
+        Return (kept entries, quarantined rows, warned rows) for one file's entries
+
+        Entries with only warnings are kept and also listed as warned rows.
+        Rows come from problem_row(), ready for ValidationReport.add_file().
+        """
+        kept = []
+        quarantined = []
+        warned = []
+        for index, entry in enumerate(entries):
+            problems = self.check(entry)
+            if not problems:
+                kept.append(entry)
+            elif self.is_fatal(problems):
+                quarantined.append(problem_row(index, entry, problems))
+            else:
+                kept.append(entry)
+                warned.append(problem_row(index, entry, problems))
+        return kept, quarantined, warned
+
+
+class ValidationReport:
+    """
+    Per-file validation results for one build
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.quarantined = []
+        self.warnings = []
+
+    def add_file(self, file_name, rows, quarantined=(), error=None, warnings=()):
+        """
+        Record one input file: its row count, quarantined and warned rows and any file-level error
+
+        file_name is the input path as given to the pipeline, e.g.
+        media/01_07_2025.json.
+        """
+        result = {"rows": rows, "quarantined": len(quarantined), "warnings": len(warnings)}
+        if error:
+            result["error"] = error
+        self.files[file_name] = result
+        self.quarantined.extend({"file": file_name, **row} for row in quarantined)
+        self.warnings.extend({"file": file_name, **row} for row in warnings)
+
+    @staticmethod
+    def _problem_counts(rows):
+        counts = Counter(f"{error['field']}:{error['code']}"
+                         for row in rows for error in row["errors"])
+        return dict(sorted(counts.items()))
+
+    def summary(self):
+        """
+        Return the counts added to the routine's summary file
+        """
+        return {
+            "files_checked": len(self.files),
+            "files_with_errors": sorted(name for name, result in self.files.items()
+                                        if "error" in result),
+            "rows_checked": sum(result["rows"] for result in self.files.values()),
+            "rows_quarantined": len(self.quarantined),
+            "rows_with_warnings": len(self.warnings),
+            "error_counts": self._problem_counts(self.quarantined),
+            "warning_counts": self._problem_counts(self.warnings)
+        }
+
+    def to_dict(self):
+        """
+        Return the full report: summary, per-file results, quarantined and warned rows
+        """
+        return {
+            **self.summary(),
+            "files": self.files,
+            "quarantined": self.quarantined,
+            "warnings": self.warnings
+        }
+
+    def print_summary(self):
+        """
+        Print the validation counts and the most common problems
+        """
+        summary = self.summary()
+        print(f"\n🛡️  Validation: {summary['rows_checked']} rows checked, "
+              f"{summary['rows_quarantined']} quarantined, "
+              f"{summary['rows_with_warnings']} kept with warnings")
+        for name in summary["files_with_errors"]:
+            print(f"   ❌ {name}: {self.files[name]['error']}")
+        for problem, count in Counter(summary["error_counts"]).most_common(5):
+            print(f"   ❌ {problem}: {count} rows quarantined")
+        for problem, count in Counter(summary["warning_counts"]).most_common(5):
+            print(f"   ⚠️  {problem}: {count} rows kept")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+SQLite export and lookups for processed exam routines
+
+export_routine() bulk-loads a processed routine into a SQLite database with
+a single executemany() in one transaction. Each routine (one output file,
+e.g. cse_processed_exam_routine) replaces only its own rows, so every
+department and term can share one database. Indexes on date, section,
+batch, course ID, room and teacher make "my exams" lookups take
+milliseconds instead of re-reading the JSON files.
+
+Query a database from the command line:
+    python routine_db.py --section "61 A"
+    python routine_db.py --batch 61 --department cse
+    python routine_db.py --teacher ABC --date 05-07-2025 --json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from normalizers import (date_ordinal, extract_batch, parse_time_range, standardize_date,
+                         standardize_section_name)
+
+# Bump when the table layout or row contents change; older databases are rebuilt
+DB_VERSION = 2
+
+DEFAULT_DATABASE = os.path.join("media", "exam_routine.db")
+
+# Column -> processed record key, in output order
+RECORD_COLUMNS = (
+    ("dept", "Dept."),
+    ("course_id", "ID"),
+    ("course_title", "Course Title"),
+    ("teacher", "Tech. Int."),
+    ("section", "Section"),
+    ("room", "Room No"),
+    ("seats", "Seat(s)"),
+    ("total", "Total"),
+    ("date", "Date"),
+    ("time", "Time"),
+    ("slot", "Slot"),
+    ("syllabus", "Syllabus"),
+    ("notes", "Notes"),
+)
+
+_SCHEMA = """
+CREATE TABLE routines (
+    routine TEXT PRIMARY KEY,
+    department TEXT NOT NULL,
+    content_hash TEXT,
+    exported_at TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE TABLE exams (
+    routine TEXT NOT NULL REFERENCES routines(routine),
+    department TEXT NOT NULL,
+    batch TEXT NOT NULL,
+    day INTEGER,
+    start_minute INTEGER,
+    end_minute INTEGER,
+    {columns}
+);
+CREATE INDEX exams_routine ON exams(routine);
+CREATE INDEX exams_date ON exams(day, start_minute);
+CREATE INDEX exams_section ON exams(section, day);
+CREATE INDEX exams_batch ON exams(batch, day);
+CREATE INDEX exams_course ON exams(course_id, day);
+CREATE INDEX exams_room ON exams(room, day);
+CREATE INDEX exams_teacher ON exams(teacher, day);
+""".format(columns=",\n    ".join(f"{column} TEXT" for column, _ in RECORD_COLUMNS))
+
+_INSERT = "INSERT INTO exams VALUES ({})".format(", ".join("?" * (6 + len(RECORD_COLUMNS))))
+
+_ORDER = "ORDER BY day IS NULL, day, start_minute, course_id, section, room"
+
+
+def connect(db_path=DEFAULT_DATABASE):
+    """
+    Open a routine database, creating or rebuilding its tables when needed
+
+    Rows come back as sqlite3.Row. A database written by another
+    DB_VERSION is emptied and recreated.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != DB_VERSION:
+        conn.executescript(f"""
+            BEGIN;
+            DROP TABLE IF EXISTS exams;
+            DROP TABLE IF EXISTS routines;
+            {_SCHEMA}
+            PRAGMA user_version = {DB_VERSION};
+            COMMIT;
+        """)
+    return conn
+
+
+def _exam_row(record, routine, department):
+    values = [record.get(key, "") for _, key in RECORD_COLUMNS]
+    section = values[4]
+    date = values[8]
+    minutes = parse_time_range(values[9]) or (None, None)
+    return (routine, department, extract_batch(section), date_ordinal(date), *minutes, *values)
+
+
+def export_routine(db_path, records, routine, department="", content_hash=None):
+    """
+    Replace one routine's rows in the database with the processed records
+
+    records are processed entries (dicts or ExamRecord objects with the
+    output keys), one per room, each with its course's Time, Slot and Total
+    rather than only the first room's (see iter_flat_records()). The delete, the bulk insert and the routines row are one
+    transaction, so readers see either the old or the new routine. When
+    content_hash matches the hash stored by the last export, nothing is
+    written and None is returned; otherwise the number of rows written.
+    """
+    conn = connect(db_path)
+    try:
+        stored = conn.execute("SELECT content_hash FROM routines WHERE routine = ?",
+                              (routine,)).fetchone()
+        if content_hash and stored and stored["content_hash"] == content_hash:
+            return None
+
+        rows = [_exam_row(record, routine, department) for record in records]
+        with conn:
+            conn.execute("DELETE FROM exams WHERE routine = ?", (routine,))
+            conn.execute("INSERT OR REPLACE INTO routines VALUES (?, ?, ?, ?, ?)",
+                         (routine, department, content_hash,
+                          datetime.now().isoformat(), len(rows)))
+            conn.executemany(_INSERT, rows)
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def find_exams(conn, section=None, batch=None, date=None, course_id=None, room=None,
+               teacher=None, department=None, routine=None):
+    """
+    Return the matching exams as dicts with the processed record keys
+
+    Every given filter must match. Sections are standardized like the
+    pipeline does ("61_A" finds "61 A") and dates are DD-MM-YYYY. Results
+    are in date and start time order; each dict also carries "routine" and
+    "department".
+    """
+    clauses = []
+    params = []
+
+    def where(clause, value):
+        clauses.append(clause)
+        params.append(value)
+
+    if section:
+        where("section = ?", standardize_section_name(section))
+    if batch:
+        where("batch = ?", str(batch))
+    if date:
+        where("day = ?", date_ordinal(standardize_date(date)))
+    if course_id:
+        where("course_id = ?", course_id)
+    if room:
+        where("room = ?", room)
+    if teacher:
+        where("teacher = ?", teacher)
+    if department:
+        where("department = ?", department)
+    if routine:
+        where("routine = ?", routine)
+
+    sql = "SELECT * FROM exams"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    rows = conn.execute(f"{sql} {_ORDER}", params).fetchall()
+
+    return [{"routine": row["routine"], "department": row["department"],
+             **{key: row[column] for column, key in RECORD_COLUMNS}}
+            for row in rows]
+
+
+def list_routines(conn):
+    """
+    Return every exported routine with its department, row count and export time
+    """
+    return [dict(row) for row in conn.execute("SELECT * FROM routines ORDER BY routine")]
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Look up exams in the exam routine database")
+    parser.add_argument("--db", default=DEFAULT_DATABASE,
+                        help=f"database written by process_exam_data.py --sqlite "
+                             f"(default: {DEFAULT_DATABASE})")
+    parser.add_argument("--section", help='section, e.g. "61 A" or 61_A')
+    parser.add_argument("--batch", help="batch number, e.g. 61")
+    parser.add_argument("--date", help="exam date, DD-MM-YYYY")
+    parser.add_argument("--course", metavar="ID", help="course ID")
+    parser.add_argument("--room", help="room number")
+    parser.add_argument("--teacher", metavar="INITIAL", help="teacher initial")
+    parser.add_argument("--department", metavar="KEY", help="department key, e.g. cse")
+    parser.add_argument("--routine", help="routine name, e.g. cse_processed_exam_routine")
+    parser.add_argument("--list", action="store_true", help="list the exported routines")
+    parser.add_argument("--json", action="store_true", help="print the matches as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Print the exams matching the command line filters
+    """
+    args = parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        print("   Run: python process_exam_data.py --sqlite")
+        return 1
+
+    conn = connect(args.db)
+    try:
+        if args.list:
+            for routine in list_routines(conn):
+                print(f"📚 {routine['routine']} ({routine['department'] or '-'}): "
+                      f"{routine['count']} entries, exported {routine['exported_at']}")
+            return 0
+
+        exams = find_exams(conn, section=args.section, batch=args.batch, date=args.date,
+                           course_id=args.course, room=args.room, teacher=args.teacher,
+                           department=args.department, routine=args.routine)
+    finally:
+        conn.close()
+
+    if args.json:
+        json.dump(exams, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+
+    if not exams:
+        print("🔍 No exams found")
+        return 0
+
+    for exam in exams:
+        print(f"📅 {exam['Date']} {exam['Time']}  {exam['ID']} {exam['Course Title']}  "
+              f"Section {exam['Section']}  Room {exam['Room No'] or '-'}  "
+              f"({exam['Tech. Int.'] or '-'})")
+    print(f"\n🔍 {len(exams)} exams found")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
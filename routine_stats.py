@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Single-pass statistics for exam routine data
+
+RoutineStatistics is fed one record at a time (add(), update() or by
+wrapping a stream with observe()) and keeps every count the scripts report:
+unique courses/sections/departments, per-section, per-date and per-room
+tallies, seat totals, section formatting and the date range. Records may be
+dicts or anything with a compatible get(key, default), such as ExamRecord.
+"""
+
+from collections import Counter
+
+from normalizers import date_sort_key
+
+# Logical field -> record key in processed output (process_exam_data.py,
+# merge_json_files.py)
+PROCESSED_KEYS = {
+    "department": "Dept.",
+    "course": "ID",
+    "section": "Section",
+    "date": "Date",
+    "room": "Room No",
+    "seats": "Seat(s)",
+}
+
+
+class RoutineStatistics:
+    """
+    Incrementally updatable statistics accumulator
+    """
+
+    def __init__(self, keys=None):
+        self.keys = dict(PROCESSED_KEYS if keys is None else keys)
+        self.total = 0
+        self.total_seats = 0
+        self.courses = set()
+        self.departments = set()
+        self.section_counts = Counter()
+        self.date_counts = Counter()
+        self.room_counts = Counter()
+        self.sections_with_hyphen = 0
+        self.sections_with_space = 0
+
+    def add(self, record):
+        """
+        Count one record
+        """
+        keys = self.keys
+        get = record.get
+        self.total += 1
+
+        self.courses.add(get(keys["course"], ""))
+        self.departments.add(get(keys["department"], ""))
+
+        section = get(keys["section"], "")
+        self.section_counts[section] += 1
+        if section:
+            if '-' in section:
+                self.sections_with_hyphen += 1
+            elif ' ' in section:
+                self.sections_with_space += 1
+
+        date = get(keys["date"], "")
+        if date and date.strip():
+            self.date_counts[date] += 1
+
+        room = get(keys["room"], "")
+        if room:
+            self.room_counts[room] += 1
+
+        seats = get(keys["seats"], "")
+        if isinstance(seats, int) or (isinstance(seats, str) and seats.isdecimal()):
+            self.total_seats += int(seats)
+
+    def update(self, records):
+        """
+        Count every record from an iterable; returns self
+        """
+        for record in records:
+            self.add(record)
+        return self
+
+    def observe(self, records):
+        """
+        Yield records unchanged while counting them
+
+        Lets statistics be collected while the records are being written.
+        """
+        for record in records:
+            self.add(record)
+            yield record
+
+    def merge(self, other):
+        """
+        Add another accumulator's counts into this one; returns self
+        """
+        self.total += other.total
+        self.total_seats += other.total_seats
+        self.courses |= other.courses
+        self.departments |= other.departments
+        self.section_counts.update(other.section_counts)
+        self.date_counts.update(other.date_counts)
+        self.room_counts.update(other.room_counts)
+        self.sections_with_hyphen += other.sections_with_hyphen
+        self.sections_with_space += other.sections_with_space
+        return self
+
+    def sorted_dates(self):
+        """
+        Return the distinct dates in chronological order
+        """
+        # Only distinct dates are parsed, once each
+        return sorted(self.date_counts, key=date_sort_key)
+
+    def summary(self):
+        """
+        Return the statistics dict written to the summary file
+
+        Keys match what get_statistics() has always returned, plus the
+        per-date and per-room tallies and the seat total.
+        """
+        dates = self.sorted_dates()
+        sections = sorted(self.section_counts)
+        return {
+            "total_entries": self.total,
+            "unique_courses": len(self.courses),
+            "unique_sections": len(sections),
+            "unique_departments": sorted(self.departments),
+            "date_range": {
+                "start": dates[0] if dates else "",
+                "end": dates[-1] if dates else "",
+                "total_days": len(dates)
+            },
+            "sections": sections,
+            "section_counts": dict(self.section_counts),
+            "courses": sorted(self.courses),
+            "date_counts": {date: self.date_counts[date] for date in dates},
+            "room_counts": dict(sorted(self.room_counts.items())),
+            "total_seats": self.total_seats
+        }
@@ -3,99 +3,89 @@
 let examData = [];
 let filteredData = [];
 let currentDepartment = 'cse'; // Default to CSE
+let searchIndex = null; // Prebuilt filter index from process_exam_data.py, if available
 
-// Department configuration
-const departmentConfig = {
-    cse: {
-        file: 'media/cse_processed_exam_routine.json',
-        name: 'CSE Department',
-        fallback: 'media/exam_routine.json',
-        fieldMapping: {
-            courseId: 'ID',
-            courseTitle: 'Course Title',
-            department: 'Dept.',
-            section: 'Section',
-            teacher: 'Tech. Int.',
-            roomNo: 'Room No',
-            seats: 'Seat(s)',
-            total: 'Total',
-            date: 'Date',
-            time: 'Time',
-            slot: 'Slot',
-            syllabus: 'Syllabus',
-            notes: 'Notes'
-        },
-        displayConfig: {
-            hasSeats: true,
-            hasTeacher: true,
-            hasSection: true,
-            hasTotal: true,
-            hasSyllabus: true,
-            hasNotes: true,
-            groupBySection: true
-        }
-    },
-    swe: {
-        file: 'media/swe_summer_mid.json',
-        name: 'SWE Department',
-        fallback: null,
-        fieldMapping: {
-            courseId: 'Course ID',
-            courseTitle: 'Course Title',
-            department: 'Department',
-            
-            section: 'Section',
-            teacher: 'Tech. Int.',
-            roomNo: 'Room No',
-            seats: 'Seat(s)',
-            total: 'Total',
-            date: 'Date',
-            time: 'Time',
-            slot: 'Slot'
-        },
-        displayConfig: {
-
-            hasSeats: true,
-            hasTeacher: true,
-            hasSection: true,
-            hasTotal: true,
-            hasSyllabus: false,
-            hasNotes: false,
-
-            hasBatch: false,
-            groupBySection: true
-        }
+let shardManifest = null; // Per-date/per-batch shard listing, if the department is sharded
+let loadedScope = 'all'; // 'all', 'batch:<batch>' or 'date:<date>' - what examData holds
+let dataVersions = {}; // Data file URL -> SHA-256 from the department's summary
+let routineVersions = []; // Row file version chain from the summary, oldest first
+
+// Search index layout this script understands (SEARCH_INDEX_VERSION in process_exam_data.py)
+const SEARCH_INDEX_VERSION = 1;
+
+// Shard manifest layout this script understands (SHARD_MANIFEST_VERSION in process_exam_data.py)
+const SHARD_MANIFEST_VERSION = 1;
+
+// Columnar data layout this script understands (COLUMNAR_VERSION in process_exam_data.py)
+const COLUMNAR_VERSION = 1;
+
+// Sessions data layout this script understands (SESSIONS_VERSION in process_exam_data.py)
+const SESSIONS_VERSION = 1;
+
+// Delta layout this script understands (DELTA_VERSION in process_exam_data.py)
+const DELTA_VERSION = 1;
+
+// Shared department schema, also read by process_exam_data.py --config
+const DEPARTMENT_SCHEMA_FILE = 'departments.json';
+
+// Department schema layout this script understands (SCHEMA_VERSION in department_schema.py)
+const DEPARTMENT_SCHEMA_VERSION = 1;
+
+// Department configuration, filled from the schema by loadDepartmentConfig()
+const departmentConfig = {};
+
+// Load the department schema. Processed files all use the same canonical
+// keys, so every department shares the schema's fieldMapping unless it
+// overrides it.
+async function loadDepartmentConfig() {
+    const response = await fetch(DEPARTMENT_SCHEMA_FILE);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
     }
-};
+    
+    const schema = await response.json();
+    if (schema.version !== DEPARTMENT_SCHEMA_VERSION) {
+        throw new Error(`Unsupported department schema version ${schema.version}`);
+    }
+    
+    for (const [key, department] of Object.entries(schema.departments)) {
+        departmentConfig[key] = {
+            ...department,
+            fieldMapping: department.fieldMapping || schema.fieldMapping
+        };
+    }
+}
 
 // Load and initialize the application
-document.addEventListener('DOMContentLoaded', function() {
-    loadExamData();
+document.addEventListener('DOMContentLoaded', async function() {
     setupEventListeners();
     setupDepartmentSelector();
+    
+    try {
+        await loadDepartmentConfig();
+    } catch (error) {
+        console.error('Error loading department schema:', error);
+        showError(`Failed to load ${DEPARTMENT_SCHEMA_FILE}. Please check that it exists next to index.html.`);
+        return;
+    }
+    loadExamData();
 });
 
 // Load exam data from JSON file
 async function loadExamData(department = currentDepartment) {
     try {
         const config = departmentConfig[department];
-        let response;
+        await loadDataVersions(config);
         
-        try {
-            response = await fetch(config.file);
-            if (!response.ok) throw new Error(`${config.name} file not found`);
-            console.log(`✅ Loading ${config.name} exam data...`);
-        } catch (e) {
-            if (config.fallback) {
-                console.log(`📁 Loading fallback exam data for ${config.name}...`);
-                response = await fetch(config.fallback);
-            } else {
-                throw new Error(`No data available for ${config.name}`);
-            }
-        }
+        // With shards, start from the student's batch/date instead of everything
+        shardManifest = await loadShardManifest(config);
+        const initial = shardManifest ? initialFilters(department) : { batch: '', date: '' };
+        const scope = shardManifest ? shardScope(initial.batch, initial.date) : { key: 'all', shard: null };
         
-        examData = await response.json();
+        examData = scope.shard ? await fetchShard(config, scope.shard) : await fetchFullData(config);
+        loadedScope = scope.key;
         filteredData = [...examData];
+        searchIndex = scope.shard || isSessionData(examData) ? null : await loadSearchIndex(config, examData.length);
         
         // Update current department
         currentDepartment = department;
@@ -103,13 +93,324 @@ async function loadExamData(department = currentDepartment) {
         populateBatchFilter();
         populateSectionFilter();
         populateDateFilter();
-        displayExamRoutine(filteredData);
+        
+        if (scope.shard) {
+            document.getElementById('batchFilter').value = initial.batch;
+            populateSectionFilterByBatch(initial.batch);
+            document.getElementById('dateFilter').value = initial.date;
+            filterData();
+        } else {
+            displayExamRoutine(filteredData);
+        }
     } catch (error) {
         console.error('Error loading exam data:', error);
         showError(`Failed to load ${departmentConfig[department]?.name || 'exam'} routine data. Please check if the JSON file exists in the media folder.`);
     }
 }
 
+// Load the content hashes listed in a department's summary. The summary is
+// always revalidated; data files are fetched under versioned URLs, so they
+// are only downloaded again when their contents change.
+async function loadDataVersions(config) {
+    dataVersions = {};
+    routineVersions = [];
+    if (!config.summary) return;
+    
+    try {
+        const response = await fetch(config.summary, { cache: 'no-cache' });
+        if (!response.ok) return;
+        
+        const summary = await response.json();
+        const base = config.summary.slice(0, config.summary.lastIndexOf('/') + 1);
+        for (const [file, hash] of Object.entries(summary.files || {})) {
+            dataVersions[base + file] = hash;
+        }
+        routineVersions = (summary.versions || []).map(version => ({
+            ...version,
+            delta: version.delta ? base + version.delta : null
+        }));
+    } catch (e) {
+        // Without a summary, only the row file is fetched, under its plain URL
+    }
+}
+
+// Whether the last build wrote an optional output (index, shards, columnar,
+// sessions): only files listed in the summary are requested, so a build
+// without those flags, or without a summary, costs no 404s
+function isPublished(url) {
+    return Object.prototype.hasOwnProperty.call(dataVersions, url);
+}
+
+// Add the content hash to a data file URL when it is known
+function versionedUrl(url, hash = dataVersions[url]) {
+    return hash ? `${url}?v=${hash.slice(0, 16)}` : url;
+}
+
+// Apply a delta from process_exam_data.py --deltas to the rows of the
+// version before it: drop removed rows, insert added ones, replace changed ones
+function applyDelta(rows, delta) {
+    const removed = new Set(delta.removed);
+    const result = rows.filter((row, i) => !removed.has(i));
+    for (const [i, row] of delta.added) {
+        result.splice(i, 0, row);
+    }
+    for (const [i, row] of delta.changed) {
+        result[i] = row;
+    }
+    if (result.length !== delta.count) {
+        throw new Error(`Delta expects ${delta.count} rows, got ${result.length}`);
+    }
+    return result;
+}
+
+// Bring the rows cached from an earlier visit up to date with the deltas
+// listed in the summary, so only what changed is downloaded. Without a usable
+// cached copy the row file is fetched and cached. Returns null on failure.
+async function fetchCachedRows(config) {
+    const key = `routine:${config.file}`;
+    const latest = routineVersions[routineVersions.length - 1];
+    let cached = null;
+    
+    try {
+        cached = JSON.parse(localStorage.getItem(key));
+    } catch (e) {
+        cached = null;
+    }
+    
+    let rows = null;
+    const start = cached ? routineVersions.findLastIndex(version => version.hash === cached.version) : -1;
+    if (start !== -1) {
+        try {
+            rows = cached.rows;
+            let current = cached.version;
+            for (const version of routineVersions.slice(start + 1)) {
+                const response = await fetch(version.delta);
+                if (!response.ok) throw new Error(`Delta to ${version.hash} not found`);
+                const delta = await response.json();
+                if (delta.version !== DELTA_VERSION || delta.from !== current) {
+                    throw new Error(`Unusable delta to ${version.hash}`);
+                }
+                rows = applyDelta(rows, delta);
+                current = version.hash;
+            }
+            console.log(`✅ Loading ${config.name} exam data (cached, ${routineVersions.length - start - 1} deltas)...`);
+        } catch (e) {
+            rows = null;
+        }
+    }
+    
+    if (!rows) {
+        try {
+            const response = await fetch(versionedUrl(config.file));
+            if (!response.ok) return null;
+            rows = await response.json();
+            console.log(`✅ Loading ${config.name} exam data...`);
+        } catch (e) {
+            return null;
+        }
+    }
+    
+    if (!cached || cached.version !== latest.hash) {
+        try {
+            localStorage.setItem(key, JSON.stringify({ version: latest.hash, rows }));
+        } catch (e) {
+            // Storage may be full or unavailable; the rows are still usable
+        }
+    }
+    return rows;
+}
+
+// Fetch a department's full routine, preferring the precomputed sessions, then
+// the compact columnar file, then the row file (patched from the copy cached
+// on an earlier visit when the summary lists deltas), then the fallback file
+async function fetchFullData(config) {
+    if (config.sessions && isPublished(config.sessions)) {
+        try {
+            const response = await fetch(versionedUrl(config.sessions));
+            if (response.ok) {
+                const sessions = await response.json();
+                if (sessions.version === SESSIONS_VERSION) {
+                    console.log(`✅ Loading ${config.name} exam data (sessions)...`);
+                    return sessions.sessions;
+                }
+            }
+        } catch (e) {
+            // Fall through to the columnar or row file
+        }
+    }
+    
+    if (config.columnar && isPublished(config.columnar)) {
+        try {
+            const response = await fetch(versionedUrl(config.columnar));
+            if (response.ok) {
+                const columns = await response.json();
+                if (columns.version === COLUMNAR_VERSION) {
+                    console.log(`✅ Loading ${config.name} exam data (columnar)...`);
+                    return decodeColumnar(columns);
+                }
+            }
+        } catch (e) {
+            // Fall through to the row file
+        }
+    }
+    
+    // Deltas describe the row file, so they only help when it is the file used
+    if (routineVersions.length) {
+        const rows = await fetchCachedRows(config);
+        if (rows) return rows;
+    }
+    
+    let response;
+    
+    try {
+        response = await fetch(versionedUrl(config.file));
+        if (!response.ok) throw new Error(`${config.name} file not found`);
+        console.log(`✅ Loading ${config.name} exam data...`);
+    } catch (e) {
+        if (config.fallback) {
+            console.log(`📁 Loading fallback exam data for ${config.name}...`);
+            response = await fetch(config.fallback);
+        } else {
+            throw new Error(`No data available for ${config.name}`);
+        }
+    }
+    
+    return response.json();
+}
+
+// Precomputed sessions carry their rooms; flat rows do not
+function isSessionData(data) {
+    return data.length > 0 && Array.isArray(data[0].rooms);
+}
+
+// Expand columnar data into row objects. Rows are lazy: each field is a
+// getter that looks its value up in the column dictionary when first read.
+function decodeColumnar(columns) {
+    const { fields, dicts, codes, count } = columns;
+    
+    function Row(i) {
+        this._i = i;
+    }
+    fields.forEach((field, f) => {
+        const values = dicts[f];
+        const column = codes[f];
+        Object.defineProperty(Row.prototype, field, {
+            get() { return values[column[this._i]]; },
+            enumerable: true
+        });
+    });
+    
+    const rows = new Array(count);
+    for (let i = 0; i < count; i++) {
+        rows[i] = new Row(i);
+    }
+    return rows;
+}
+
+// Load the shard manifest for a department; null if it is not sharded
+async function loadShardManifest(config) {
+    const manifestUrl = `${config.shards}manifest.json`;
+    if (!config.shards || !isPublished(manifestUrl)) return null;
+    
+    try {
+        const response = await fetch(versionedUrl(manifestUrl));
+        if (!response.ok) return null;
+        
+        const manifest = await response.json();
+        return manifest.version === SHARD_MANIFEST_VERSION ? manifest : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+// Fetch one shard listed in the manifest
+async function fetchShard(config, shard) {
+    const response = await fetch(versionedUrl(`${config.shards}${shard.file}`, shard.sha256));
+    if (!response.ok) throw new Error(`Shard ${shard.file} not found`);
+    console.log(`🧩 Loading ${shard.count} entries from ${shard.file}`);
+    return response.json();
+}
+
+// Pick the smallest shard that covers the given filters
+function shardScope(batch, date) {
+    if (batch && shardManifest.batch[batch]) {
+        return { key: `batch:${batch}`, shard: shardManifest.batch[batch] };
+    }
+    if (!batch && date && shardManifest.date[date]) {
+        return { key: `date:${date}`, shard: shardManifest.date[date] };
+    }
+    return { key: 'all', shard: null };
+}
+
+// Filters to start with: ?batch= / ?date= from the URL, else the last batch chosen
+function initialFilters(department) {
+    const params = new URLSearchParams(window.location.search);
+    let batch = params.get('batch') || '';
+    const date = params.get('date') || '';
+    
+    if (!batch && !date) {
+        try {
+            batch = localStorage.getItem(`examBatch:${department}`) || '';
+        } catch (e) {
+            batch = '';
+        }
+    }
+    
+    return {
+        batch: shardManifest.batch[batch] ? batch : '',
+        date: shardManifest.date[date] ? date : ''
+    };
+}
+
+// Remember the chosen batch so the next visit only loads that shard
+function rememberBatch(batch) {
+    try {
+        localStorage.setItem(`examBatch:${currentDepartment}`, batch);
+    } catch (e) {
+        // Storage may be unavailable (private browsing); nothing to do
+    }
+}
+
+// Make sure examData covers the active filters, fetching another shard or
+// the full routine if needed. Once the full routine is loaded it is kept.
+async function ensureDataForFilters() {
+    if (!shardManifest || loadedScope === 'all') return;
+    
+    const batch = document.getElementById('batchFilter').value;
+    const date = document.getElementById('dateFilter').value;
+    const scope = shardScope(batch, date);
+    if (scope.key === loadedScope) return;
+    
+    const config = departmentConfig[currentDepartment];
+    try {
+        examData = scope.shard ? await fetchShard(config, scope.shard) : await fetchFullData(config);
+        loadedScope = scope.key;
+        searchIndex = scope.shard || isSessionData(examData) ? null : await loadSearchIndex(config, examData.length);
+    } catch (error) {
+        console.error('Error loading exam data shard:', error);
+    }
+}
+
+// Load the prebuilt search index for a department; null if missing or stale
+async function loadSearchIndex(config, recordCount) {
+    if (!config.index || !isPublished(config.index)) return null;
+    
+    try {
+        const response = await fetch(versionedUrl(config.index));
+        if (!response.ok) return null;
+        
+        const index = await response.json();
+        if (index.version !== SEARCH_INDEX_VERSION || index.count !== recordCount) {
+            console.log(`⚠️ Ignoring stale search index for ${config.name}`);
+            return null;
+        }
+        return index;
+    } catch (e) {
+        console.log(`📁 No search index for ${config.name}, filtering without it`);
+        return null;
+    }
+}
+
 // Setup event listeners
 function setupEventListeners() {
     const batchFilter = document.getElementById('batchFilter');
@@ -119,7 +420,7 @@ function setupEventListeners() {
     
     batchFilter.addEventListener('change', onBatchChange);
     sectionFilter.addEventListener('change', filterData);
-    dateFilter.addEventListener('change', filterData);
+    dateFilter.addEventListener('change', onDateChange);
     courseSearch.addEventListener('input', debounce(filterData, 300));
 }
 
@@ -148,7 +449,10 @@ function populateBatchFilter() {
     const config = departmentConfig[currentDepartment];
     let batches = [];
     
-    if (config.displayConfig.hasSection) {
+    if (shardManifest) {
+        // Sharded - the manifest lists every batch, even if only one is loaded
+        batches = Object.keys(shardManifest.batch).sort();
+    } else if (config.displayConfig.hasSection) {
         // For CSE - extract batch from section
         batches = [...new Set(examData.map(exam => extractBatch(exam[config.fieldMapping.section])))].filter(batch => batch).sort();
     } else if (config.displayConfig.hasBatch) {
@@ -174,18 +478,28 @@ function populateBatchFilter() {
 }
 
 // Handle batch filter change - update sections dropdown
-function onBatchChange() {
+async function onBatchChange() {
     const selectedBatch = document.getElementById('batchFilter').value;
-    populateSectionFilterByBatch(selectedBatch);
+    rememberBatch(selectedBatch);
     
     // Reset section and date filters when batch changes
     document.getElementById('sectionFilter').value = '';
     document.getElementById('dateFilter').value = '';
     
+    // Load the batch shard (or the full routine) before rebuilding sections
+    await ensureDataForFilters();
+    populateSectionFilterByBatch(selectedBatch);
+    
     // Apply filtering
     filterData();
 }
 
+// Handle date filter change - fetch the date's shard if needed
+async function onDateChange() {
+    await ensureDataForFilters();
+    filterData();
+}
+
 // Populate section filter based on selected batch - Dynamic
 function populateSectionFilterByBatch(selectedBatch) {
     const sectionFilter = document.getElementById('sectionFilter');
@@ -252,7 +566,9 @@ function populateSectionFilter() {
 function populateDateFilter() {
     const dateFilter = document.getElementById('dateFilter');
     const config = departmentConfig[currentDepartment];
-    const dates = [...new Set(examData.map(exam => exam[config.fieldMapping.date]))].filter(date => date && date.trim());
+    const dates = shardManifest ?
+        Object.keys(shardManifest.date).filter(date => date !== 'unknown') :
+        [...new Set(examData.map(exam => exam[config.fieldMapping.date]))].filter(date => date && date.trim());
     
     // Sort dates chronologically
     const sortedDates = dates.sort((a, b) => {
@@ -283,6 +599,12 @@ function filterData() {
     const mapping = config.fieldMapping;
     const display = config.displayConfig;
     
+    if (searchIndex && display.hasSection) {
+        filteredData = filterWithIndex(searchIndex, batchFilter, sectionFilter, dateFilter, searchTerm);
+        displayExamRoutine(filteredData);
+        return;
+    }
+    
     filteredData = examData.filter(exam => {
         // Dynamic batch matching
         let matchesBatch = true;
@@ -341,6 +663,31 @@ function filterData() {
     displayExamRoutine(filteredData);
 }
 
+// Filter using the prebuilt index: intersect the offset lists of the active
+// filters, then match the search term against each candidate's search string
+function filterWithIndex(index, batch, section, date, searchTerm) {
+    const lists = [];
+    if (batch) lists.push(index.batch[batch] || []);
+    if (section) lists.push(index.section[section] || []);
+    if (date) lists.push(index.date[date] || []);
+    
+    let offsets;
+    if (lists.length === 0) {
+        offsets = examData.map((_, i) => i);
+    } else {
+        // Walk the smallest list in order so results keep their original order
+        lists.sort((a, b) => a.length - b.length);
+        const others = lists.slice(1).map(list => new Set(list));
+        offsets = lists[0].filter(i => others.every(set => set.has(i)));
+    }
+    
+    if (searchTerm) {
+        offsets = offsets.filter(i => index.tokens[i].includes(searchTerm));
+    }
+    
+    return offsets.map(i => examData[i]);
+}
+
 // Display exam routine grouped by date
 function displayExamRoutine(data) {
     const container = document.getElementById('routineContainer');
@@ -373,12 +720,7 @@ function displayExamRoutine(data) {
     // Display today's exams
     if (todayExamsData.length > 0) {
         todayExams.style.display = 'block';
-        const todayGrouped = groupExamsBySession(todayExamsData);
-        todayContainer.innerHTML = `<div class="exams-grid">${
-            Object.entries(todayGrouped).map(([sessionKey, sessionData]) => 
-                createSessionHTML(sessionKey, sessionData)
-            ).join('')
-        }</div>`;
+        todayContainer.innerHTML = `<div class="exams-grid">${renderSessionCards(todayExamsData)}</div>`;
     } else {
         todayExams.style.display = 'none';
     }
@@ -386,12 +728,7 @@ function displayExamRoutine(data) {
     // Display next upcoming exams
     if (nextExamsData.length > 0) {
         nextExams.style.display = 'block';
-        const nextGrouped = groupExamsBySession(nextExamsData);
-        nextContainer.innerHTML = `<div class="exams-grid">${
-            Object.entries(nextGrouped).map(([sessionKey, sessionData]) => 
-                createSessionHTML(sessionKey, sessionData)
-            ).join('')
-        }</div>`;
+        nextContainer.innerHTML = `<div class="exams-grid">${renderSessionCards(nextExamsData)}</div>`;
     } else {
         nextExams.style.display = 'none';
     }
@@ -409,12 +746,7 @@ function displayExamRoutine(data) {
     // Display past exams
     if (pastExamsData.length > 0) {
         pastExams.style.display = 'block';
-        const pastGrouped = groupExamsBySession(pastExamsData);
-        pastContainer.innerHTML = `<div class="exams-grid">${
-            Object.entries(pastGrouped).map(([sessionKey, sessionData]) => 
-                createSessionHTML(sessionKey, sessionData)
-            ).join('')
-        }</div>`;
+        pastContainer.innerHTML = `<div class="exams-grid">${renderSessionCards(pastExamsData)}</div>`;
     } else {
         pastExams.style.display = 'none';
     }
@@ -544,7 +876,6 @@ function formatDate(dateString) {
 // Create HTML for a date group
 function createDateGroupHTML(date, exams) {
     const formattedDate = formatDate(date);
-    const examsBySession = groupExamsBySession(exams);
     const isToday = isCurrentDate(date);
     
     return `
@@ -554,89 +885,74 @@ function createDateGroupHTML(date, exams) {
                 ${isToday ? '<span class="today-badge">TODAY</span>' : ''}
             </div>
             <div class="exams-grid">
-                ${Object.entries(examsBySession).map(([session, sessionExams]) => 
-                    createSessionHTML(session, sessionExams)
-                ).join('')}
+                ${renderSessionCards(exams)}
             </div>
         </div>
     `;
 }
 
-// Group exams by course and section for the same session
+// Render exam cards. Precomputed sessions are rendered as they are; flat
+// rows are grouped into sessions first.
+function renderSessionCards(items) {
+    if (isSessionData(items)) {
+        return items.map(session => createSessionHTML(session, session.rooms)).join('');
+    }
+    return groupExamsBySession(items)
+        .map(({ course, rooms }) => createSessionHTML(course, rooms))
+        .join('');
+}
+
+// Group flat rows by course and section, in first-seen order. Rooms use the
+// same keys as the rooms of precomputed sessions.
 function groupExamsBySession(exams) {
     const config = departmentConfig[currentDepartment];
-    const sessions = {};
-    
-    console.log(`🔍 Grouping ${exams.length} exams for ${config.name}`);
+    const mapping = config.fieldMapping;
+    const display = config.displayConfig;
+    const sessions = new Map();
     
     exams.forEach(exam => {
-        const courseId = exam[config.fieldMapping.courseId];
+        const courseId = exam[mapping.courseId];
         
         // Create a session key based on available data
         // Don't include slot/time in grouping since some entries have empty values
         let sessionKey;
-        if (config.displayConfig.hasSection) {
-            const section = exam[config.fieldMapping.section];
-            sessionKey = `${courseId}-${section}`;
-        } else if (config.displayConfig.hasBatch) {
-            const batch = exam[config.fieldMapping.batch];
-            sessionKey = `${courseId}-${batch}`;
+        if (display.hasSection) {
+            sessionKey = `${courseId}-${exam[mapping.section]}`;
+        } else if (display.hasBatch) {
+            sessionKey = `${courseId}-${exam[mapping.batch]}`;
         } else {
             sessionKey = `${courseId}`;
         }
         
-        if (!sessions[sessionKey]) {
-            sessions[sessionKey] = {
-                course: exam,
-                rooms: []
-            };
-            console.log(`✅ New session: ${sessionKey}`);
-        } else {
-            console.log(`📋 Adding to existing session: ${sessionKey}`);
-            // Update course info with the entry that has complete information (time, slot)
-            const currentTime = sessions[sessionKey].course[config.fieldMapping.time];
-            const examTime = exam[config.fieldMapping.time];
-            if (!currentTime && examTime) {
-                sessions[sessionKey].course = exam;
-            }
+        let session = sessions.get(sessionKey);
+        if (!session) {
+            session = { course: exam, rooms: [], roomNos: new Set() };
+            sessions.set(sessionKey, session);
+        } else if (!session.course[mapping.time] && exam[mapping.time]) {
+            // Prefer the entry that has complete information (time, slot)
+            session.course = exam;
         }
         
-        // Add room information (only if room field exists)
-        const roomInfo = {};
-        
-        if (config.fieldMapping.roomNo) {
-            roomInfo.roomNo = exam[config.fieldMapping.roomNo];
-        }
+        // Skip rooms already listed for this session
+        const roomNo = mapping.roomNo ? exam[mapping.roomNo] : undefined;
+        if (session.roomNos.has(roomNo)) return;
+        session.roomNos.add(roomNo);
         
-        // Add seats if available
-        if (config.displayConfig.hasSeats && config.fieldMapping.seats && exam[config.fieldMapping.seats]) {
-            roomInfo.seats = exam[config.fieldMapping.seats];
+        const room = { [mapping.roomNo]: roomNo };
+        if (display.hasSeats && mapping.seats && exam[mapping.seats]) {
+            room[mapping.seats] = exam[mapping.seats];
         }
-        
-        // Add total if available
-        if (config.displayConfig.hasTotal && config.fieldMapping.total && exam[config.fieldMapping.total]) {
-            roomInfo.total = exam[config.fieldMapping.total];
-        }
-        
-        // Check if this room already exists for this session to prevent duplicates
-        const existingRoom = sessions[sessionKey].rooms.find(room => 
-            room.roomNo === roomInfo.roomNo
-        );
-        
-        if (!existingRoom) {
-            sessions[sessionKey].rooms.push(roomInfo);
-            console.log(`🏠 Added room: ${roomInfo.roomNo} to ${sessionKey}`);
-        } else {
-            console.log(`⚠️ Duplicate room ${roomInfo.roomNo} for ${sessionKey} - skipping`);
+        if (display.hasTotal && mapping.total && exam[mapping.total]) {
+            room[mapping.total] = exam[mapping.total];
         }
+        session.rooms.push(room);
     });
     
-    return sessions;
+    return [...sessions.values()];
 }
 
 // Create HTML for a session (course with multiple rooms) - Dynamic based on department
-function createSessionHTML(sessionKey, sessionData) {
-    const { course, rooms } = sessionData;
+function createSessionHTML(course, rooms) {
     const config = departmentConfig[currentDepartment];
     const mapping = config.fieldMapping;
     const display = config.displayConfig;
@@ -697,7 +1013,7 @@ function createSessionHTML(sessionKey, sessionData) {
     
     // Add total students if available
     if (display.hasTotal && rooms.length > 0) {
-        const total = rooms.find(r => r.total)?.total || course[mapping.total] || 'N/A';
+        const total = course[mapping.total] || rooms.find(r => r[mapping.total])?.[mapping.total] || 'N/A';
         detailsHTML += `
             <div class="detail-item">
                 <span class="detail-label">Total Students:</span>
@@ -708,13 +1024,13 @@ function createSessionHTML(sessionKey, sessionData) {
     
     // Build room info dynamically (only if rooms have room numbers)
     let roomInfoHTML = '';
-    if (rooms.length > 0 && rooms[0].roomNo) {
+    if (rooms.length > 0 && rooms[0][mapping.roomNo]) {
         roomInfoHTML = rooms.map(room => {
             let roomHTML = `<div class="room-details">
-                <span class="room-number">${room.roomNo}</span>`;
+                <span class="room-number">${room[mapping.roomNo]}</span>`;
             
-            if (display.hasSeats && room.seats) {
-                roomHTML += `<span class="seat-info">${room.seats}</span>`;
+            if (display.hasSeats && room[mapping.seats]) {
+                roomHTML += `<span class="seat-info">${room[mapping.seats]}</span>`;
             }
             
             roomHTML += `</div>`;
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Per-section routines and iCalendar files
+
+write_section_routines() splits the precomputed sessions (see
+build_sessions() in process_exam_data.py) by section in one pass and
+writes, for every section, a small JSON routine and an .ics calendar that
+students can import into their phone. A student then downloads a couple of
+KB for their own section instead of the whole department routine.
+
+Exam times like "09:00 AM - 10:30 AM" are Bangladesh local time (UTC+6, no
+daylight saving) and are written to the calendar in UTC; exams without a
+parseable time become all-day events.
+"""
+
+import hashlib
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from json_backend import dumps
+from json_stream import atomic_write
+from normalizers import date_ordinal, extract_batch, parse_time_range
+
+# Bump when the per-section JSON layout changes
+SECTION_ROUTINE_VERSION = 1
+
+# Offset of the exam times from UTC (Asia/Dhaka)
+EXAM_UTC_OFFSET = timedelta(hours=6)
+
+PRODID = "-//DIU Exam Routine//Section Routine//EN"
+
+_UNSAFE_NAME = re.compile(r'[^0-9A-Za-z]+')
+
+
+def section_file_stem(section):
+    """
+    Return the file name (without extension) for a section, e.g. "61 A" -> "61_A"
+    """
+    return _UNSAFE_NAME.sub('_', section).strip('_') or "section"
+
+
+def _escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """
+    Fold a content line into 75-octet pieces as RFC 5545 requires
+    """
+    pieces = []
+    current = ""
+    size = 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > 75:
+            pieces.append(current)
+            current = " "
+            size = 1
+        current += char
+        size += width
+    pieces.append(current)
+    return "\r\n".join(pieces)
+
+
+def _utc(ordinal, minutes):
+    local = datetime.fromordinal(ordinal) + timedelta(minutes=minutes)
+    return (local - EXAM_UTC_OFFSET).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _room_text(room):
+    if room.get("Seat(s)"):
+        return f"{room['Room No']} ({room['Seat(s)']} seats)"
+    return room["Room No"]
+
+
+def session_event(session, stamp):
+    """
+    Return the VEVENT lines for one session, or [] if its date is invalid
+
+    stamp is the DTSTAMP value (UTC, e.g. "20250701T000000Z").
+    """
+    ordinal = date_ordinal(session.get("Date"))
+    if ordinal is None:
+        return []
+
+    uid_source = "|".join(str(session.get(key, "")) for key in ("Section", "Date", "ID", "Course Title"))
+    uid = hashlib.sha1(uid_source.encode('utf-8')).hexdigest()[:20]
+
+    minutes = parse_time_range(session.get("Time"))
+    if minutes:
+        when = [f"DTSTART:{_utc(ordinal, minutes[0])}", f"DTEND:{_utc(ordinal, minutes[1])}"]
+    else:
+        day = datetime.fromordinal(ordinal)
+        when = [f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+                f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}"]
+
+    rooms = [room for room in session.get("rooms", []) if room.get("Room No")]
+    title = " - ".join(part for part in (session.get("ID"), session.get("Course Title")) if part)
+    details = [f"Section: {session.get('Section', '')}"]
+    if session.get("Tech. Int."):
+        details.append(f"Teacher: {session['Tech. Int.']}")
+    if rooms:
+        details.append("Rooms: " + ", ".join(_room_text(room) for room in rooms))
+    if session.get("Total"):
+        details.append(f"Total students: {session['Total']}")
+    if session.get("Slot"):
+        details.append(f"Slot: {session['Slot']}")
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@diu-exam-routine",
+        f"DTSTAMP:{stamp}",
+        *when,
+        f"SUMMARY:{_escape(title or 'Exam')}",
+    ]
+    if rooms:
+        lines.append(f"LOCATION:{_escape(', '.join(room['Room No'] for room in rooms))}")
+    lines.append(f"DESCRIPTION:{_escape(chr(10).join(details))}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def build_calendar(section, sessions, stamp):
+    """
+    Return the iCalendar text for one section's sessions
+    """
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(f'Exam Routine {section}')}",
+    ]
+    for session in sessions:
+        lines.extend(session_event(session, stamp))
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
+
+
+def _write_section(args):
+    out_dir, stem, section, sessions, stamp = args
+    routine = {
+        "version": SECTION_ROUTINE_VERSION,
+        "section": section,
+        "batch": extract_batch(section),
+        "count": len(sessions),
+        "sessions": sessions
+    }
+    json_output = atomic_write(os.path.join(out_dir, f"{stem}.json"), 'wb', skip_unchanged=True)
+    with json_output as f:
+        f.write(dumps(routine))
+
+    # newline='' keeps the CRLF line endings iCalendar requires
+    ics_output = atomic_write(os.path.join(out_dir, f"{stem}.ics"), skip_unchanged=True)
+    with ics_output as f:
+        f.reconfigure(newline='')
+        f.write(build_calendar(section, sessions, stamp))
+
+    return section, {
+        "json": f"{stem}.json",
+        "ics": f"{stem}.ics",
+        "count": len(sessions),
+        "sha256": json_output.sha256
+    }, json_output.changed or ics_output.changed
+
+
+def write_section_routines(sessions, out_dir, stamp, workers=1):
+    """
+    Write <section>.json and <section>.ics for every section, plus index.json
+
+    sessions is the "sessions" list from build_sessions(); every section
+    keeps them in the same date and start time order. Files are written by
+    up to `workers` threads and left untouched when their bytes did not
+    change; files of sections that no longer exist are removed. Returns
+    (index, number of sections whose files changed).
+    """
+    by_section = defaultdict(list)
+    for session in sessions:
+        if session.get("Section"):
+            by_section[session["Section"]].append(session)
+
+    os.makedirs(out_dir, exist_ok=True)
+    used = set()
+    jobs = []
+    for section in sorted(by_section):
+        stem = section_file_stem(section)
+        # Sections differing only in punctuation would share a file name
+        while stem in used:
+            stem += "_"
+        used.add(stem)
+        jobs.append((out_dir, stem, section, by_section[section], stamp))
+
+    if workers > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_write_section, jobs))
+    else:
+        results = [_write_section(job) for job in jobs]
+
+    index = {
+        "version": SECTION_ROUTINE_VERSION,
+        "sections": {section: entry for section, entry, _ in results}
+    }
+    with atomic_write(os.path.join(out_dir, "index.json"), 'wb', skip_unchanged=True) as f:
+        f.write(dumps(index, pretty=True))
+
+    keep = {"index.json"} | {name for _, entry, _ in results for name in (entry["json"], entry["ics"])}
+    for name in os.listdir(out_dir):
+        if name.endswith((".json", ".ics")) and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+
+    return index, sum(1 for _, _, changed in results if changed)
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Local HTTP server for the exam routine site
+
+Serves the website and its processed outputs the way an exam-day deployment
+should, so the setup can be load-tested locally:
+- Sends the .br or .gz sibling written by process_exam_data.py --precompress
+  when the client accepts it; other text files are gzipped once in memory
+- Strong ETags from each file's SHA-256 (the hashes in the summary file),
+  computed once per file version; files are kept in memory until they change
+- Conditional GET: If-None-Match / If-Modified-Since answer 304
+- Range requests: a single byte range answers 206 (If-Range is honored)
+- Versioned URLs (?v=<hash>, see script.js) whose hash matches the file and
+  delta files are cacheable forever; every other response must be revalidated
+- GET /api/section?department=cse&section=61_A returns one section's exams
+  from an in-memory index built once at startup (restart to pick up a new
+  routine); GET /api/sections?department=cse lists the sections
+
+Usage:
+    python serve_routine.py
+    python serve_routine.py --port 8080 --bind 0.0.0.0 --log
+"""
+
+import argparse
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import sys
+import threading
+import time
+from collections import defaultdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from department_schema import DEFAULT_SCHEMA_FILE, SchemaError, load_departments
+from json_backend import JSONDecodeError, dumps, read_json
+from normalizers import extract_batch, standardize_section_name
+
+DEFAULT_PORT = 8000
+
+# Content types worth compressing; images like the PNG logo already are
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+# Smaller bodies are sent as they are
+GZIP_MIN_SIZE = 1024
+
+# Sibling file suffix for each precompressed encoding, preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+JSON_TYPE = "application/json; charset=utf-8"
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+
+# Hex digits of the SHA-256 a ?v= parameter must carry (script.js sends 16)
+VERSION_MIN_LENGTH = 16
+
+mimetypes.add_type("application/json", ".json")
+mimetypes.add_type("text/javascript", ".js")
+mimetypes.add_type("text/calendar", ".ics")
+
+
+class Resource:
+    """
+    One response body with its encoded variants
+
+    sha256 is the hex digest of the identity body. variants maps a content
+    coding ("identity", "gzip" or "br") to (body bytes, strong ETag);
+    identity is always present.
+    """
+
+    __slots__ = ("content_type", "last_modified", "sha256", "variants")
+
+    def __init__(self, content_type, body, last_modified=None):
+        self.content_type = content_type
+        self.last_modified = last_modified
+        self.sha256 = hashlib.sha256(body).hexdigest()
+        self.variants = {"identity": (body, f'"{self.sha256[:16]}"')}
+
+    def add_variant(self, encoding, body):
+        tag = self.variants["identity"][1][1:-1]
+        self.variants[encoding] = (body, f'"{tag}-{encoding}"')
+
+    def compress(self):
+        """
+        Add a gzip variant when the type is compressible and none exists yet
+        """
+        body = self.variants["identity"][0]
+        if ("gzip" not in self.variants and len(body) >= GZIP_MIN_SIZE
+                and self.content_type.startswith(COMPRESSIBLE_TYPES)):
+            # mtime=0 keeps the bytes identical for identical input
+            self.add_variant("gzip", gzip.compress(body, compresslevel=9, mtime=0))
+        return self
+
+
+def content_type(path):
+    """
+    Return the Content-Type header value for a file name
+    """
+    kind = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if kind.startswith("text/") or kind in ("application/json", "application/javascript"):
+        kind += "; charset=utf-8"
+    return kind
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class AssetCache:
+    """
+    Files under a root folder as Resources, reloaded when they change
+
+    A file is re-read only when its size or modification time, or those of
+    its precompressed siblings, differ from the cached version. Siblings
+    older than the file they compress are ignored.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, url_path):
+        """
+        Return the file path for a URL path, or None outside the root or for hidden files
+        """
+        parts = [part for part in posixpath.normpath(unquote(url_path)).split("/") if part]
+        if any(part.startswith(".") for part in parts):
+            return None
+        path = os.path.realpath(os.path.join(self.root, *parts))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        return path if os.path.isfile(path) else None
+
+    def get(self, path):
+        """
+        Return the Resource for a file path from resolve()
+        """
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size,
+                     *(_mtime_ns(path + suffix) for _, suffix in PRECOMPRESSED))
+        cached = self._cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        resource = Resource(content_type(path), body, last_modified=stat.st_mtime)
+        for (encoding, suffix), sibling_mtime in zip(PRECOMPRESSED, signature[2:]):
+            if sibling_mtime is not None and sibling_mtime >= stat.st_mtime_ns:
+                with open(path + suffix, 'rb') as f:
+                    resource.add_variant(encoding, f.read())
+        resource.compress()
+
+        with self._lock:
+            self._cache[path] = (signature, resource)
+        return resource
+
+
+class SectionIndex:
+    """
+    Every department's exams grouped by section, serialized once at startup
+
+    sections maps (department key, section) to a Resource with
+    {"department", "section", "batch", "count", "exams"}; listings maps a
+    department key to a Resource with {"department", "sections": {section:
+    count}}. Exams keep the order of the processed routine.
+    """
+
+    def __init__(self, departments):
+        self.default = departments[0].key if departments else None
+        self.sections = {}
+        self.listings = {}
+        self.loaded_at = time.time()
+
+        for department in departments:
+            try:
+                rows = read_json(department.output)
+            except (OSError, JSONDecodeError) as e:
+                print(f"   ⚠️  {department.key}: cannot read {department.output} ({e}), skipped")
+                continue
+
+            by_section = defaultdict(list)
+            for row in rows:
+                if isinstance(row, dict) and row.get("Section"):
+                    by_section[standardize_section_name(row["Section"])].append(row)
+
+            for section, exams in by_section.items():
+                self.sections[department.key, section] = self._resource({
+                    "department": department.key,
+                    "section": section,
+                    "batch": extract_batch(section),
+                    "count": len(exams),
+                    "exams": exams
+                })
+            self.listings[department.key] = self._resource({
+                "department": department.key,
+                "sections": {section: len(by_section[section]) for section in sorted(by_section)}
+            })
+
+    def _resource(self, data):
+        return Resource(JSON_TYPE, dumps(data), last_modified=self.loaded_at).compress()
+
+
+def accepted_encodings(header):
+    """
+    Return the content codings an Accept-Encoding header allows (q > 0)
+    """
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    Parse a Range header against a body of `size` bytes
+
+    Returns (first, last) inclusive, None when the header should be ignored
+    (other units, several ranges or bad syntax) and False when the range
+    cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0 or size == 0:
+                return False
+            return max(size - length, 0), size - 1
+        first = int(first)
+        last = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        return False
+    if last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+def _http_date(timestamp):
+    return email.utils.formatdate(timestamp, usegmt=True)
+
+
+def _parse_http_date(text):
+    try:
+        return email.utils.parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class RoutineRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves static files and the section API; see the module docstring
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ExamRoutine/1.0"
+    log_requests = False
+
+    def do_GET(self):
+        self.handle_request(head=False)
+
+    def do_HEAD(self):
+        self.handle_request(head=True)
+
+    def handle_request(self, head):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == "/api/section":
+            self.send_section(params, head)
+            return
+        if url.path == "/api/sections":
+            self.send_listing(params, head)
+            return
+
+        assets = self.server.assets
+        path = assets.resolve(url.path)
+        if path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            resource = assets.get(path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        # Versioned URLs and delta files (named by their hashes) never change;
+        # a ?v= that is not this file's hash must not pin the current bytes
+        version = params.get("v", [""])[0]
+        immutable = (len(version) >= VERSION_MIN_LENGTH and resource.sha256.startswith(version)
+                     or "_deltas/" in url.path)
+        self.send_resource(resource, CACHE_IMMUTABLE if immutable else CACHE_REVALIDATE, head)
+
+    def send_section(self, params, head):
+        sections = self.server.sections
+        department = params.get("department", [sections.default])[0]
+        section = params.get("section", [""])[0]
+        if not section:
+            self.send_json_error(HTTPStatus.BAD_REQUEST, "the section parameter is required", head)
+            return
+        resource = sections.sections.get((department, standardize_section_name(section)))
+        if resource is None:
+            self.send_json_error(HTTPStatus.NOT_FOUND,
+                                 f"no exams for section {section!r} in {department!r}", head)
+            return
+        self.send_resource(resource, CACHE_REVALIDATE, head)
+
+    def send_listing(self, params, head):
+        sections = self.server.sections
+        department = params.get("department", [sections.default])[0]
+        resource = sections.listings.get(department)
+        if resource is None:
+            self.send_json_error(HTTPStatus.NOT_FOUND, f"unknown department {department!r}", head)
+            return
+        self.send_resource(resource, CACHE_REVALIDATE, head)
+
+    def send_json_error(self, status, message, head):
+        body = dumps({"error": message})
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def choose_encoding(self, resource):
+        if len(resource.variants) == 1:
+            return "identity"
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        for encoding, _ in PRECOMPRESSED:
+            if encoding in resource.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def is_not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or etag in tags
+        since = _parse_http_date(self.headers.get("If-Modified-Since"))
+        return since is not None and last_modified is not None and int(last_modified) <= since
+
+    def requested_range(self, etag, last_modified, size):
+        header = self.headers.get("Range")
+        if not header:
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range:
+            if_range = if_range.strip()
+            if if_range.startswith('"'):
+                if if_range != etag:
+                    return None
+            elif last_modified is None or if_range != _http_date(last_modified):
+                return None
+        return parse_range(header, size)
+
+    def send_resource(self, resource, cache_control, head):
+        encoding = self.choose_encoding(resource)
+        body, etag = resource.variants[encoding]
+        last_modified = resource.last_modified
+
+        def common_headers():
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            if last_modified is not None:
+                self.send_header("Last-Modified", _http_date(last_modified))
+            if len(resource.variants) > 1:
+                self.send_header("Vary", "Accept-Encoding")
+
+        if self.is_not_modified(etag, last_modified):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            common_headers()
+            self.end_headers()
+            return
+
+        byte_range = self.requested_range(etag, last_modified, len(body))
+        if byte_range is False:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{len(body)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if byte_range:
+            first, last = byte_range
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(body)}")
+            body = body[first:last + 1]
+        else:
+            self.send_response(HTTPStatus.OK)
+        common_headers()
+        self.send_header("Content-Type", resource.content_type)
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.log_requests:
+            super().log_message(format, *args)
+
+
+class RoutineServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the asset cache and the section index
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, root, departments, log_requests=False):
+        handler = type("Handler", (RoutineRequestHandler,), {"log_requests": log_requests})
+        super().__init__(address, handler)
+        self.assets = AssetCache(root)
+        self.sections = SectionIndex(departments)
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Serve the exam routine site and section API locally")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--bind", default="127.0.0.1", metavar="ADDRESS",
+                        help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--root", default=str(Path(__file__).parent),
+                        help="folder to serve (default: the project folder)")
+    parser.add_argument("--config", default=DEFAULT_SCHEMA_FILE, metavar="FILE",
+                        help="department schema under the root, for the section API "
+                             f"(default: {DEFAULT_SCHEMA_FILE})")
+    parser.add_argument("--log", action="store_true",
+                        help="log every request (off by default, e.g. for load tests)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Serve until interrupted
+    """
+    args = parse_args(argv)
+
+    try:
+        departments = load_departments(os.path.join(args.root, args.config))
+    except SchemaError as e:
+        print(f"❌ Invalid department schema: {e}")
+        return 1
+
+    server = RoutineServer((args.bind, args.port), args.root, departments, log_requests=args.log)
+    print(f"📚 Section index: {len(server.sections.sections)} sections in "
+          f"{len(server.sections.listings)} departments")
+    print(f"🌐 Serving {server.assets.root} at http://{args.bind}:{server.server_address[1]}/. "
+          "Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped serving")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling for the exam routine pipeline
+
+Records wall time, CPU time, records in/out and tracemalloc peak memory for
+each named stage. Use it as a context manager or a decorator:
+
+    profiler = StageProfiler()
+
+    with profiler.stage("clean", records_in=len(data)) as stage:
+        cleaned = clean_exam_data(data)
+        stage.records_out = len(cleaned)
+
+    @profiler.profile("group")
+    def group(data): ...
+
+A disabled profiler (StageProfiler(enabled=False)) does no measurement, so
+the pipeline can always go through it. Stages are meant to run one after
+another; nesting them makes the memory peaks of the outer stage meaningless.
+"""
+
+import functools
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StageResult:
+    """
+    Measurements for one stage
+    """
+
+    __slots__ = ("name", "wall_seconds", "cpu_seconds", "records_in", "records_out", "peak_bytes")
+
+    def __init__(self, name, records_in=None):
+        self.name = name
+        self.records_in = records_in
+        self.records_out = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_bytes = None
+
+    def to_dict(self):
+        """
+        Return the measurements as a JSON-serializable dict
+        """
+        return {
+            "stage": self.name,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "records_in": self.records_in,
+            "records_out": self.records_out,
+            "peak_bytes": self.peak_bytes
+        }
+
+
+class StageProfiler:
+    """
+    Collects StageResults for a pipeline run
+    """
+
+    def __init__(self, enabled=True, trace_memory=True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.results = []
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name, records_in=None):
+        """
+        Measure the enclosed block as stage `name`
+
+        Yields the StageResult so the block can set records_out.
+        """
+        result = StageResult(name, records_in)
+        if not self.enabled:
+            yield result
+            return
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield result
+        finally:
+            result.wall_seconds = time.perf_counter() - wall_start
+            result.cpu_seconds = time.process_time() - cpu_start
+            if self.trace_memory:
+                result.peak_bytes = max(tracemalloc.get_traced_memory()[1] - base, 0)
+            self.results.append(result)
+
+    def profile(self, name=None):
+        """
+        Decorator measuring each call as a stage
+
+        records_in/records_out are taken from len() of the first argument and
+        of the return value when they have one.
+        """
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                records_in = _length(args[0]) if args else None
+                with self.stage(stage_name, records_in) as result:
+                    value = func(*args, **kwargs)
+                    result.records_out = _length(value)
+                return value
+
+            return wrapper
+
+        return decorator
+
+    def stop(self):
+        """
+        Stop tracemalloc if this profiler started it
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self):
+        """
+        Return every recorded stage as a list of dicts
+        """
+        return [result.to_dict() for result in self.results]
+
+    def print_report(self):
+        """
+        Print a per-stage table
+        """
+        if not self.results:
+            return
+
+        print("\n⏱️  Stage profile:")
+        print(f"   {'stage':<20} {'wall s':>9} {'cpu s':>9} {'in':>9} {'out':>9} {'peak MB':>9}")
+        for result in self.results:
+            peak = f"{result.peak_bytes / 1048576:.2f}" if result.peak_bytes is not None else "-"
+            print(f"   {result.name:<20} {result.wall_seconds:>9.4f} {result.cpu_seconds:>9.4f} "
+                  f"{_display(result.records_in):>9} {_display(result.records_out):>9} {peak:>9}")
+
+
+def _length(value):
+    """
+    Return len(value), or None for values without a length
+    """
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _display(count):
+    """
+    Format an optional record count for the report table
+    """
+    return "-" if count is None else str(count)
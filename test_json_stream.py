@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for json_stream.py
+
+Run with: python -m pytest
+"""
+
+import json
+import os
+
+import pytest
+
+from json_backend import dumps, read_json
+from json_stream import JsonArrayWriter, NotAJSONArray, atomic_write, file_sha256, iter_json_array
+
+DOCUMENTS = [
+    '[]',
+    ' \n [ ] ',
+    '[12.5]',
+    '[1, -2, 3.25, -4.5e-3, 1E+3, 0, 100]',
+    '[true, false, null, "x", 12.5]',
+    '[{"Section": "61 A", "Total": 51, "Seat(s)": 12.5}, {"Notes": ""}]',
+    '[ {"a": [1, 2.5, {"b": null}]} ,\n  "\\u00e9\\"]," , [[], {}], -0.5 ]',
+    '[{"Course Title": "Communicative English – বাংলা", "Room No": "501A"}]',
+]
+
+
+def write(tmp_path, text):
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_every_chunk_size_matches_json_load(tmp_path, text):
+    path = write(tmp_path, text)
+    expected = json.loads(text)
+    for chunk_size in range(1, len(text) + 2):
+        assert list(iter_json_array(path, chunk_size=chunk_size)) == expected, chunk_size
+
+
+@pytest.mark.parametrize("text", DOCUMENTS[2:4])
+def test_byte_order_mark_is_skipped(tmp_path, text):
+    path = write(tmp_path, '\ufeff' + text)
+    for chunk_size in (1, 2, 64):
+        assert list(iter_json_array(path, chunk_size=chunk_size)) == json.loads(text)
+    assert list(iter_json_array(path)) == read_json(path)
+
+
+def test_number_split_at_default_chunk_boundary(tmp_path):
+    # The chunk ends right after "12." of "12.5"
+    path = write(tmp_path, '[' + ' ' * (65536 - 4) + '12.5]')
+    assert list(iter_json_array(path)) == [12.5]
+
+
+def test_not_an_array(tmp_path):
+    with pytest.raises(NotAJSONArray):
+        list(iter_json_array(write(tmp_path, '{"a": 1}')))
+
+
+@pytest.mark.parametrize("text", ['', '[1, 2', '[1 2]', '[1,]', '[12.]', '[{"a": 1}'])
+def test_malformed_input_raises(tmp_path, text):
+    path = write(tmp_path, text)
+    for chunk_size in (1, 2, 3, 64):
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(path, chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+@pytest.mark.parametrize("items", [[], [{"a": 1}], [{"a": [1, 2]}, "x", 3.5, None]])
+def test_writer_matches_dumps(tmp_path, items, pretty):
+    path = tmp_path / "out.json"
+    with open(path, 'wb') as f:
+        with JsonArrayWriter(f, pretty) as writer:
+            writer.write_all(items)
+    assert path.read_bytes() == dumps(items, pretty)
+
+
+def test_atomic_write_replaces_on_success(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_bytes(b"old")
+    output = atomic_write(path, 'wb')
+    with output as f:
+        f.write(b"new")
+    assert path.read_bytes() == b"new"
+    assert output.changed
+    assert os.listdir(tmp_path) == ["out.json"]
+
+
+def test_atomic_write_keeps_file_on_error_or_cancel(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, 'wb') as f:
+            f.write(b"partial")
+            raise RuntimeError("boom")
+    output = atomic_write(path, 'wb')
+    with output as f:
+        f.write(b"discarded")
+        output.cancel()
+    assert path.read_bytes() == b"old"
+    assert not output.changed
+    assert os.listdir(tmp_path) == ["out.json"]
+
+
+def test_atomic_write_skip_unchanged_keeps_mtime(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_bytes(b"same")
+    os.utime(path, ns=(1, 1))
+    output = atomic_write(path, 'wb', skip_unchanged=True)
+    with output as f:
+        f.write(b"same")
+    assert not output.changed
+    assert output.sha256 == file_sha256(path)
+    assert os.stat(path).st_mtime_ns == 1
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for merge_json_files.py
+
+Run with: python -m pytest
+"""
+
+import json
+import os
+
+from merge_json_files import merge_json_files_streaming
+
+
+def test_streaming_merge_formats_and_keeps_good_entries(tmp_path):
+    good = tmp_path / "a.json"
+    good.write_text(json.dumps([{"Section": "61-A", "Total": "40"}]), encoding='utf-8')
+    single = tmp_path / "b.json"
+    single.write_text(json.dumps({"Section": "62-B"}), encoding='utf-8')
+    broken = tmp_path / "c.json"
+    broken.write_text('[{"Section": "63-C"}, {"Section": ', encoding='utf-8')
+    output = tmp_path / "out" / "merged.json"
+    output.parent.mkdir()
+
+    assert merge_json_files_streaming([broken, single, good], output)
+    assert json.loads(output.read_text(encoding='utf-8')) == [
+        {"Section": "61 A", "Total": "40"}, {"Section": "62 B"}, {"Section": "63 C"}]
+    assert os.listdir(output.parent) == ["merged.json"]
+
+
+def test_streaming_merge_without_entries_leaves_no_files(tmp_path):
+    empty = tmp_path / "a.json"
+    empty.write_text("[]", encoding='utf-8')
+    output = tmp_path / "out" / "merged.json"
+    output.parent.mkdir()
+
+    assert not merge_json_files_streaming([empty], output)
+    assert os.listdir(output.parent) == []
+
+
+def test_streaming_merge_reads_files_with_a_byte_order_mark(tmp_path):
+    bom = tmp_path / "a.json"
+    bom.write_text(json.dumps([{"Section": "61-A"}, {"Section": "61-B"}]), encoding='utf-8-sig')
+    output = tmp_path / "merged.json"
+
+    assert merge_json_files_streaming([bom], output)
+    assert json.loads(output.read_text(encoding='utf-8')) == [
+        {"Section": "61 A"}, {"Section": "61 B"}]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Tests for process_exam_data.py
+
+Run with: python -m pytest
+"""
+
+import json
+import os
+import random
+
+import pytest
+
+from process_exam_data import (DELTA_HISTORY, UNKNOWN_DATE_SHARD, BuildOptions, ExamRecord,
+                               apply_delta, build_delta, find_conflicts,
+                               group_exams_by_date_and_course, process_departments,
+                               process_exam_routine, update_version_chain, write_shards)
+from routine_db import connect, find_exams
+
+DATE = "30-06-2025"
+
+
+def exam(course_id, section, time, slot, room="501A", seats="20", total="20", date=DATE):
+    return ExamRecord(course_id=course_id, section=section, room_no=room, seats=seats,
+                      total=total, date=date, time=time, slot=slot)
+
+
+def conflicts(*exams):
+    return find_conflicts(group_exams_by_date_and_course(exams))
+
+
+def overlapping_slots(result):
+    return sorted(tuple(session["slot"] for session in overlap["sessions"])
+                  for overlap in result["room_overlaps"])
+
+
+def test_long_session_overlaps_every_later_session():
+    result = conflicts(
+        exam("CSE101", "61 A", "09:00 AM - 12:30 PM", "A"),
+        exam("CSE102", "61 B", "09:30 AM - 10:00 AM", "B"),
+        exam("CSE103", "61 C", "11:00 AM - 12:00 PM", "C"),
+    )
+    assert overlapping_slots(result) == [("A", "B"), ("A", "C")]
+    assert result["counts"]["room_overlaps"] == 2
+
+
+def test_back_to_back_sessions_and_other_rooms_do_not_overlap():
+    result = conflicts(
+        exam("CSE101", "61 A", "09:00 AM - 10:30 AM", "A"),
+        exam("CSE102", "61 B", "10:30 AM - 12:00 PM", "B"),
+        exam("CSE103", "61 C", "09:30 AM - 11:00 AM", "C", room="502"),
+        exam("CSE104", "61 D", "09:30 AM - 11:00 AM", "C", date="01-07-2025"),
+    )
+    assert result["room_overlaps"] == []
+
+
+def test_chained_overlaps():
+    result = conflicts(
+        exam("CSE101", "61 A", "09:00 AM - 10:00 AM", "A"),
+        exam("CSE102", "61 B", "09:30 AM - 11:00 AM", "B"),
+        exam("CSE103", "61 C", "10:30 AM - 11:30 AM", "C"),
+    )
+    assert overlapping_slots(result) == [("A", "B"), ("B", "C")]
+
+
+def test_shared_room_in_one_slot_is_utilization_not_conflict():
+    result = conflicts(
+        exam("CSE101", "61 A", "09:00 AM - 10:30 AM", "A", seats="20"),
+        exam("CSE102", "62 A", "09:00 AM - 10:30 AM", "A", seats="15", total="15"),
+    )
+    assert result["room_overlaps"] == []
+    usage = result["room_utilization"]["501A"]
+    assert (usage["sessions"], usage["shared_sessions"], usage["seats"]) == (1, 1, 35)
+
+
+def test_duplicates_clashes_and_seat_mismatches():
+    result = conflicts(
+        exam("CSE101", "61 A", "09:00 AM - 10:30 AM", "A", seats="10", total="30"),
+        exam("CSE101", "61 A", "09:00 AM - 10:30 AM", "A", seats="10", total="30"),
+        exam("CSE102", "61 A", "09:00 AM - 10:30 AM", "A", room="502"),
+    )
+    assert result["counts"] == {"room_overlaps": 0, "duplicate_allocations": 1,
+                                "section_clashes": 1, "seat_mismatches": 1}
+    assert result["section_clashes"][0]["courses"] == ["CSE101", "CSE102"]
+    assert result["seat_mismatches"][0]["allocated"] == 20
+
+
+def routine_row(n, **changes):
+    return {"Date": f"{n % 28 + 1:02d}-07-2025", "ID": f"CSE{n:03d}", "Section": f"61 {n % 5}",
+            "Room No": str(500 + n % 7), "Seat(s)": "20", "Tech. Int.": "ABC", **changes}
+
+
+ROWS = [routine_row(n) for n in range(12)]
+
+
+@pytest.mark.parametrize("new_rows", [
+    ROWS,
+    ROWS[1:],
+    ROWS[:-1],
+    ROWS[:5] + ROWS[6:],
+    [routine_row(99)] + ROWS,
+    ROWS[:3] + [routine_row(98), routine_row(97)] + ROWS[3:],
+    ROWS + [routine_row(96)],
+    ROWS[:4] + [routine_row(4, **{"Tech. Int.": "XYZ"})] + ROWS[5:],
+    ROWS[:4] + [routine_row(4, **{"Room No": "999"})] + ROWS[5:],
+    ROWS[6:] + ROWS[:6],
+    ROWS + ROWS[:2],
+    [],
+])
+def test_delta_round_trip(new_rows):
+    delta = build_delta(ROWS, new_rows)
+    assert apply_delta(ROWS, delta) == new_rows
+    assert apply_delta([], build_delta([], new_rows)) == new_rows
+
+
+def test_unchanged_version_has_an_empty_delta():
+    delta = build_delta(ROWS, [dict(row) for row in ROWS])
+    assert (delta["removed"], delta["added"], delta["changed"]) == ([], [], [])
+    assert apply_delta(ROWS, delta) == ROWS
+
+
+def test_changed_field_is_listed_as_changed():
+    new_rows = [dict(row) for row in ROWS]
+    new_rows[3]["Seat(s)"] = "25"
+    delta = build_delta(ROWS, new_rows)
+    assert delta["changed"] == [[3, new_rows[3]]]
+    assert (delta["removed"], delta["added"]) == ([], [])
+
+
+def test_random_edits_round_trip():
+    rng = random.Random(7)
+    for _ in range(200):
+        new_rows = [dict(row) for row in ROWS]
+        for _ in range(rng.randint(0, 6)):
+            edit = rng.choice(("insert", "delete", "change"))
+            if edit == "insert" or not new_rows:
+                new_rows.insert(rng.randint(0, len(new_rows)), routine_row(rng.randint(0, 200)))
+            elif edit == "delete":
+                del new_rows[rng.randrange(len(new_rows))]
+            else:
+                new_rows[rng.randrange(len(new_rows))]["Tech. Int."] = str(rng.random())
+        assert apply_delta(ROWS, build_delta(ROWS, new_rows)) == new_rows
+
+
+def test_apply_delta_checks_the_row_count():
+    delta = build_delta(ROWS, ROWS[1:])
+    with pytest.raises(ValueError):
+        apply_delta(ROWS[1:], delta)
+
+
+def chain_step(tmp_path, summary, previous, new, previous_hash, new_hash):
+    chain, delta = update_version_chain(summary, previous, previous_hash, new, new_hash,
+                                        "now", str(tmp_path / "routine_deltas"))
+    return {"versions": chain, "last_updated": "now"}, delta
+
+
+def delta_files(tmp_path):
+    folder = tmp_path / "routine_deltas"
+    return sorted(os.listdir(folder)) if folder.exists() else []
+
+
+def test_first_run_on_unchanged_routine_starts_a_single_version_chain(tmp_path):
+    summary, delta = chain_step(tmp_path, {"last_updated": "then"}, ROWS, ROWS,
+                                "a" * 64, "a" * 64)
+    assert delta is None
+    assert summary["versions"] == [{"hash": "a" * 16, "updated": "then", "count": 12,
+                                    "delta": None}]
+    assert delta_files(tmp_path) == []
+
+
+def test_version_chain_grows_and_patches(tmp_path):
+    summary, _ = chain_step(tmp_path, {}, ROWS, ROWS, "a" * 64, "a" * 64)
+    new_rows = ROWS[1:] + [routine_row(50)]
+    summary, delta = chain_step(tmp_path, summary, ROWS, new_rows, "a" * 64, "b" * 64)
+    assert [v["hash"] for v in summary["versions"]] == ["a" * 16, "b" * 16]
+    assert summary["versions"][1]["delta"] == f"routine_deltas/{'a' * 16}_{'b' * 16}.json"
+    assert (delta["from"], delta["to"]) == ("a" * 16, "b" * 16)
+    assert apply_delta(ROWS, delta) == new_rows
+    assert delta_files(tmp_path) == [f"{'a' * 16}_{'b' * 16}.json"]
+
+    # Unchanged again: nothing is added
+    again, delta = chain_step(tmp_path, summary, new_rows, new_rows, "b" * 64, "b" * 64)
+    assert delta is None and again["versions"] == summary["versions"]
+
+
+def test_broken_chain_starts_over_from_the_routine_on_disk(tmp_path):
+    summary, _ = chain_step(tmp_path, {}, ROWS, ROWS[1:], "a" * 64, "b" * 64)
+    assert delta_files(tmp_path) == [f"{'a' * 16}_{'b' * 16}.json"]
+    # The file on disk is "c", not the chain's last version "b"
+    summary, delta = chain_step(tmp_path, summary, ROWS, ROWS[2:], "c" * 64, "d" * 64)
+    assert [v["hash"] for v in summary["versions"]] == ["c" * 16, "d" * 16]
+    assert delta_files(tmp_path) == [f"{'c' * 16}_{'d' * 16}.json"]
+
+
+def test_version_chain_keeps_the_last_versions_only(tmp_path):
+    summary = {}
+    rows = ROWS
+    hashes = [f"{n:x}" * 64 for n in range(DELTA_HISTORY + 3)]
+    for previous_hash, new_hash in zip(hashes, hashes[1:]):
+        new_rows = rows + [routine_row(len(rows) + 100)]
+        summary, _ = chain_step(tmp_path, summary, rows, new_rows, previous_hash, new_hash)
+        rows = new_rows
+    chain = summary["versions"]
+    assert len(chain) == DELTA_HISTORY
+    assert chain[-1]["hash"] == hashes[-1][:16]
+    assert delta_files(tmp_path) == sorted(v["delta"].split("/")[1] for v in chain if v["delta"])
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_rows_with_count_warnings_are_built(tmp_path, stream):
+    media = tmp_path / "media"
+    media.mkdir()
+    rows = [{**routine_row(1), "Course Title": "Physics", "Seat(s)": "²", "Total": "²"},
+            {**routine_row(2), "Course Title": "Chemistry", "Seat(s)": "-L", "Total": None}]
+    # Written with a byte order mark, like Windows exports
+    (media / "routine.json").write_text(json.dumps(rows), encoding="utf-8-sig")
+    output = tmp_path / "out" / "routine.json"
+
+    assert process_exam_routine(str(media), str(output), stream=stream)
+    built = json.loads(output.read_text(encoding="utf-8"))
+    assert [row["Seat(s)"] for row in built] == ["²", "-L"]
+    report = json.loads((tmp_path / "out" / "routine_validation.json").read_text(encoding="utf-8"))
+    assert report["rows_with_warnings"] == 2
+
+
+def test_shards_never_use_an_invalid_date_as_file_name(tmp_path):
+    shard_dir = tmp_path / "shards"
+    records = [exam("CSE101", "61 A", "09:00 AM - 10:30 AM", "A"),
+               exam("CSE102", "61 B", "09:00 AM - 10:30 AM", "A", date="01/07/2025"),
+               exam("CSE103", "62 A", "09:00 AM - 10:30 AM", "A", date="../x"),
+               exam("CSE104", "62 B", "09:00 AM - 10:30 AM", "A", date="")]
+    manifest = write_shards(records, str(shard_dir))
+    assert manifest["total"] == 4
+    assert {key: shard["count"] for key, shard in manifest["date"].items()} == {
+        DATE: 1, UNKNOWN_DATE_SHARD: 2}
+    assert sorted(os.listdir(shard_dir / "date")) == [f"{DATE}.json", "unknown.json"]
+    assert sorted(os.listdir(tmp_path)) == ["shards"]
+
+
+def test_sqlite_export_has_the_time_on_every_room(tmp_path):
+    media = tmp_path / "media"
+    media.mkdir()
+    rows = [{**routine_row(n), "Course Title": "Physics", "Date": date, "ID": course,
+             "Section": "37 A", "Room No": room, "Time": time, "Slot": slot, "Total": total}
+            for n, (date, course, room, time, slot, total) in enumerate([
+                ("02-07-2025", "PHY101", "501", "09:00 AM - 10:30 AM", "A", "40"),
+                ("02-07-2025", "PHY101", "502", "", "", ""),
+                ("01-07-2025", "CSE101", "601", "11:00 AM - 12:30 PM", "B", "40"),
+                ("01-07-2025", "CSE101", "602", "", "", ""),
+                ("01-07-2025", "CSE102", "603", "09:00 AM - 10:30 AM", "A", "20"),
+            ])]
+    (media / "routine.json").write_text(json.dumps(rows), encoding="utf-8")
+    database = str(tmp_path / "routine.db")
+    assert process_exam_routine(str(media), str(tmp_path / "routine.json"),
+                                BuildOptions(database=database))
+
+    conn = connect(database)
+    exams = find_exams(conn, section="37 A")
+    conn.close()
+    assert [(exam["ID"], exam["Room No"], exam["Time"], exam["Slot"], exam["Total"])
+            for exam in exams] == [
+        ("CSE102", "603", "09:00 AM - 10:30 AM", "A", "20"),
+        ("CSE101", "601", "11:00 AM - 12:30 PM", "B", "40"),
+        ("CSE101", "602", "11:00 AM - 12:30 PM", "B", "40"),
+        ("PHY101", "501", "09:00 AM - 10:30 AM", "A", "40"),
+        ("PHY101", "502", "09:00 AM - 10:30 AM", "A", "40"),
+    ]
+
+
+def write_schema(tmp_path, rows_a, rows_b):
+    for name, rows in (("a", rows_a), ("b", rows_b)):
+        if rows is not None:
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "input.json").write_text(json.dumps(rows), encoding="utf-8")
+    schema = {"version": 1, "departments": {
+        name: {"name": name.upper(), "inputs": [f"{name}/*.json"], "file": f"{name}.json"}
+        for name in ("a", "b")}}
+    schema_file = tmp_path / "departments.json"
+    schema_file.write_text(json.dumps(schema), encoding="utf-8")
+    return str(schema_file)
+
+
+def departments_rows(n, title="Physics"):
+    return [{**routine_row(i), "Course Title": title} for i in range(n)]
+
+
+def test_departments_write_nothing_when_one_has_no_inputs(tmp_path):
+    schema_file = write_schema(tmp_path, departments_rows(4), None)
+    assert not process_departments(schema_file)
+    assert not (tmp_path / "a.json").exists()
+
+
+def test_departments_refuse_to_replace_a_routine_with_far_fewer_rows(tmp_path):
+    schema_file = write_schema(tmp_path, departments_rows(10), departments_rows(4))
+    assert process_departments(schema_file)
+    assert len(json.loads((tmp_path / "a.json").read_text(encoding="utf-8"))) == 10
+
+    (tmp_path / "a" / "input.json").write_text(json.dumps(departments_rows(3, "Chemistry")),
+                                               encoding="utf-8")
+    (tmp_path / "b" / "input.json").write_text(json.dumps(departments_rows(5, "Chemistry")),
+                                               encoding="utf-8")
+    before = (tmp_path / "b.json").read_bytes()
+    assert not process_departments(schema_file)
+    assert len(json.loads((tmp_path / "a.json").read_text(encoding="utf-8"))) == 10
+    assert (tmp_path / "b.json").read_bytes() == before
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for record_validator.py
+
+Run with: python -m pytest
+"""
+
+import pytest
+
+from process_exam_data import ExamRecord, LEGACY_SOURCE_FIELDS, clean_exam_record
+from record_validator import RecordValidator, ValidationReport
+
+ROW = {
+    "Dept.": "CSE", "ID": "CSE113", "Course Title": "Programming and Problem",
+    "Tech. Int.": "HH", "Section": "68_Q", "Room No": "501A", "Seat(s)": "16",
+    "Total": "16", "Date": "30-06-2025", "Time": "11:30 AM - 01:00 PM", "Slot": "B",
+}
+
+
+@pytest.fixture
+def validator():
+    return RecordValidator(ExamRecord.KEYS, LEGACY_SOURCE_FIELDS)
+
+
+def row(**changes):
+    entry = dict(ROW)
+    for key, value in changes.items():
+        if value is ...:
+            del entry[key]
+        else:
+            entry[key] = value
+    return entry
+
+
+def test_valid_row(validator):
+    assert validator.check(ROW) == []
+    assert validator.split([ROW]) == ([ROW], [], [])
+
+
+def test_aliases_are_checked(validator):
+    entry = row(**{"Dept.": ...})
+    entry["Department"] = 5
+    assert [problem[:2] for problem in validator.check(entry)] == [("Dept.", "type")]
+
+
+@pytest.mark.parametrize("entry, field, code", [
+    ({**ROW, "Seat(s)": "-L"}, "Seat(s)", "format"),
+    ({**ROW, "Total": "6000"}, "Total", "range"),
+    ({**ROW, "Total": True}, "Total", "type"),
+    ({**ROW, "Date": "2025-06-30"}, "Date", "format"),
+    ({**ROW, "Date": "31-02-2025"}, "Date", "format"),
+    ({**ROW, "Time": "soon"}, "Time", "format"),
+    ({**ROW, "Time": "01:00 PM - 11:30 AM"}, "Time", "range"),
+    ({**ROW, "Tech. Int.": 7}, "Tech. Int.", "type"),
+])
+def test_format_problems_are_warnings(validator, entry, field, code):
+    problems = validator.check(entry)
+    assert [problem[:2] for problem in problems] == [(field, code)]
+    assert not validator.is_fatal(problems)
+    kept, quarantined, warned = validator.split([entry])
+    assert kept == [entry] and quarantined == []
+    assert warned[0]["index"] == 0 and warned[0]["errors"][0]["field"] == field
+
+
+@pytest.mark.parametrize("value", [None, "", "  ", 0, 16])
+def test_null_empty_and_numeric_counts_pass(validator, value):
+    assert validator.check({**ROW, "Total": value, "Seat(s)": value}) == []
+
+
+@pytest.mark.parametrize("entry", [
+    row(Section=...),
+    row(Section="  "),
+    row(Section=None),
+    row(Section=61),
+    row(Date=...),
+    {**ROW, "Course Title": ""},
+    ["not", "an", "object"],
+])
+def test_unusable_rows_are_quarantined(validator, entry):
+    problems = validator.check(entry)
+    assert validator.is_fatal(problems)
+    kept, quarantined, warned = validator.split([ROW, entry])
+    assert kept == [ROW] and warned == []
+    assert quarantined[0]["index"] == 1 and quarantined[0]["entry"] == entry
+
+
+def test_warned_rows_clean_like_the_baseline():
+    record = clean_exam_record({**ROW, "Seat(s)": "-L", "Total": None, "Tech. Int.": 7,
+                                "Room No": None})
+    assert (record.seats, record.total, record.teacher, record.room_no) == ("-L", "", "7", "")
+    assert record.section == "68 Q"
+
+
+def test_report_counts(validator):
+    report = ValidationReport()
+    bad_seat = {**ROW, "Seat(s)": "-L"}
+    kept, quarantined, warned = validator.split([ROW, bad_seat, row(Section=...)])
+    report.add_file("media/a.json", 3, quarantined, warnings=warned)
+    report.add_file("media/b.json", 0, error="JSON decode error")
+
+    summary = report.summary()
+    assert summary == {
+        "files_checked": 2,
+        "files_with_errors": ["media/b.json"],
+        "rows_checked": 3,
+        "rows_quarantined": 1,
+        "rows_with_warnings": 1,
+        "error_counts": {"Section:required": 1},
+        "warning_counts": {"Seat(s):format": 1},
+    }
+    full = report.to_dict()
+    assert full["files"]["media/a.json"] == {"rows": 3, "quarantined": 1, "warnings": 1}
+    assert full["warnings"][0]["file"] == "media/a.json"
+    assert full["warnings"][0]["entry"] == bad_seat
+    assert len(kept) == 2
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for serve_routine.py
+
+Run with: python -m pytest
+"""
+
+import gzip
+import hashlib
+import http.client
+import threading
+
+import pytest
+
+from serve_routine import (CACHE_IMMUTABLE, CACHE_REVALIDATE, RoutineServer, accepted_encodings,
+                           parse_range)
+
+BODY = b'[{"Section": "61 A"}]' * 100
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-0", (0, 0)),
+    ("bytes=5-", (5, 9)),
+    ("bytes=-3", (7, 9)),
+    ("bytes=-20", (0, 9)),
+    ("bytes=2-100", (2, 9)),
+    ("bytes=10-", False),
+    ("bytes=-0", False),
+    ("bytes=3-1", None),
+    ("bytes=0-1,3-4", None),
+    ("items=0-1", None),
+    ("bytes=a-b", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 10) == expected
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip;q=0.5, br;q=0, identity") == {"gzip", "identity"}
+    assert accepted_encodings(None) == set()
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "routine.json").write_bytes(BODY)
+    server = RoutineServer(("127.0.0.1", 0), str(tmp_path), [])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, **headers):
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_versioned_url_is_immutable_only_for_the_current_hash(server):
+    digest = hashlib.sha256(BODY).hexdigest()
+    response, _ = get(server, f"/media/routine.json?v={digest[:16]}")
+    assert response.getheader("Cache-Control") == CACHE_IMMUTABLE
+    for version in ("0123456789abcdef", digest[:4], ""):
+        response, _ = get(server, f"/media/routine.json?v={version}")
+        assert response.getheader("Cache-Control") == CACHE_REVALIDATE
+
+
+def test_conditional_and_range_requests(server):
+    response, body = get(server, "/media/routine.json")
+    etag = response.getheader("ETag")
+    assert (response.status, body) == (200, BODY)
+    assert etag == f'"{hashlib.sha256(BODY).hexdigest()[:16]}"'
+
+    response, body = get(server, "/media/routine.json", **{"If-None-Match": etag})
+    assert (response.status, body) == (304, b"")
+
+    response, body = get(server, "/media/routine.json", Range="bytes=0-9")
+    assert (response.status, body) == (206, BODY[:10])
+    assert response.getheader("Content-Range") == f"bytes 0-9/{len(BODY)}"
+
+    response, body = get(server, "/media/routine.json", Range="bytes=0-9", **{"If-Range": '"x"'})
+    assert (response.status, body) == (200, BODY)
+
+
+def test_gzip_variant(server):
+    response, body = get(server, "/media/routine.json", **{"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(body) == BODY
+
+
+def test_paths_outside_the_root_and_hidden_files_are_not_served(server, tmp_path):
+    (tmp_path / ".secret").write_text("x")
+    for path in ("/../etc/passwd", "/.secret", "/media/missing.json"):
+        assert get(server, path)[0].status == 404
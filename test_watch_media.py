@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for watch_media.py
+
+Run with: python -m pytest
+"""
+
+import json
+import os
+
+from watch_media import build_inputs, is_input, parse_args
+
+
+def test_default_build_watches_the_media_folder():
+    patterns, outputs, exclude = build_inputs(parse_args([]))
+    assert patterns == [os.path.join("media", "*.json")]
+    assert outputs == ["media/cse_processed_exam_routine.json"] and exclude == []
+    # Like a manual run, the routine is read back unless --exclude-output is given
+    assert is_input("media/cse_processed_exam_routine.json", patterns, exclude)
+    assert not is_input("media/cse_processed_exam_routine.json", patterns,
+                        build_inputs(parse_args(["--exclude-output"]))[2])
+
+
+def test_config_build_watches_every_department(tmp_path):
+    schema = {"version": 1, "departments": {
+        "cse": {"name": "CSE", "inputs": ["media/*.json"], "file": "media/cse.json"},
+        "swe": {"name": "SWE", "inputs": ["media/Data/*.json"], "file": "media/swe.json"}}}
+    schema_file = tmp_path / "departments.json"
+    schema_file.write_text(json.dumps(schema), encoding="utf-8")
+    base = str(tmp_path)
+
+    patterns, outputs, exclude = build_inputs(parse_args(["--config", str(schema_file)]))
+    assert outputs == exclude == [os.path.join(base, "media/cse.json"),
+                                  os.path.join(base, "media/swe.json")]
+    for name, expected in (("media/a.json", True), ("media/Data/b.json", True),
+                           ("media/cse.json", False), ("media/swe.json", False),
+                           ("media/cse_summary.json", False), ("media/.a.json.x.tmp", False),
+                           ("media/Data/x/c.json", False), ("media/notes.txt", False)):
+        assert is_input(os.path.join(base, name), patterns, exclude) == expected, name
+
+    patterns, outputs, _ = build_inputs(parse_args(["--config", str(schema_file),
+                                                    "--department", "swe"]))
+    assert patterns == [os.path.join(base, "media/Data/*.json")]
+    assert outputs == [os.path.join(base, "media/swe.json")]
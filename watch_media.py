@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+DIU Exam Routine Watcher
+
+Keeps the processed routine up to date while files are dropped into media/:
+- Takes the same options as process_exam_data.py and runs the same build,
+  so a watched rebuild matches a manual run (with --config, every department
+  in departments.json)
+- Watches the folders the build reads its input files from
+- Uses inotify on Linux, falling back to polling elsewhere
+- Waits for a burst of file writes to settle before rebuilding
+- Every output is replaced atomically, so the site never reads a half-written file
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+import process_exam_data
+from department_schema import SchemaError, load_departments
+from stage_profiler import StageProfiler
+
+# inotify event flags (linux/inotify.h)
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CLOSE_WRITE = 0x00000008
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Report changed files in a set of folders using Linux inotify
+    """
+
+    def __init__(self, folders):
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.folders = {}
+        for folder in folders:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {folder}")
+            self.folders[wd] = folder
+
+    def wait(self, timeout=None):
+        """
+        Return the set of changed paths, or an empty set after timeout seconds
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name and wd in self.folders:
+                    changed.add(os.path.join(self.folders[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Report changed JSON files by comparing folder snapshots
+    """
+
+    def __init__(self, folders, interval=1.0):
+        self.folders = list(folders)
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for folder in self.folders:
+            for path in glob.glob(os.path.join(folder, "*.json")):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """
+        Return the set of changed paths, or an empty set after timeout seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+            current = self._scan()
+            changed = {path for path in current.keys() | self.snapshot.keys()
+                       if current.get(path) != self.snapshot.get(path)}
+            self.snapshot = current
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(folders, force_polling=False, interval=1.0):
+    """
+    Return an inotify watcher when possible, otherwise a polling watcher
+    """
+    if not force_polling:
+        try:
+            return InotifyWatcher(folders)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(folders, interval)
+
+
+def build_inputs(args):
+    """
+    Return (input glob patterns, output files, excluded files) of the build the options describe
+    """
+    if not args.config:
+        exclude = [args.output] if args.exclude_output else []
+        return [os.path.join(args.media, "*.json")], [args.output], exclude
+    
+    departments = load_departments(args.config)
+    if args.department:
+        departments = [department for department in departments
+                       if department.key in args.department]
+    outputs = [department.output for department in departments]
+    patterns = [pattern for department in departments for pattern in department.inputs]
+    # process_departments() never reads any department's output back
+    return patterns, outputs, outputs
+
+
+def is_input(path, patterns, exclude):
+    """
+    True for JSON files the build reads, ignoring its own artifacts and temporary files
+    """
+    folder, name = os.path.split(os.path.normpath(path))
+    return (not name.startswith(".")
+            and any(folder == os.path.dirname(os.path.normpath(pattern))
+                    and fnmatch.fnmatch(name, os.path.basename(pattern))
+                    for pattern in patterns)
+            and process_exam_data.is_input_file(path, exclude))
+
+
+def collect_changes(watcher, debounce):
+    """
+    Block until files change, then keep collecting until `debounce` seconds pass quietly
+    """
+    changed = watcher.wait()
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+def file_signature(path):
+    """
+    Return (mtime_ns, size) for a file, or None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def rebuild(changed, options, inputs, own_writes):
+    """
+    Re-run the build when any of the changed paths is one of its inputs
+
+    own_writes maps the build's outputs to their signature after the last
+    rebuild; events for them are ignored while the file is unchanged since.
+    """
+    patterns, outputs, exclude = inputs
+    changed = {path for path in map(os.path.normpath, changed)
+               if path not in own_writes or file_signature(path) != own_writes[path]}
+    if not any(is_input(path, patterns, exclude) for path in changed):
+        return False
+
+    print("\n🔄 Input changed, rebuilding...")
+    process_exam_data.make_build(options, StageProfiler(enabled=options.profile))()
+    # Without --exclude-output the routine is its own input; its rewrite is not a change
+    for output in outputs:
+        own_writes[os.path.normpath(output)] = file_signature(output)
+    return True
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options: the build options of process_exam_data.py plus the watcher's
+    """
+    parser = process_exam_data.build_parser()
+    parser.description = "Rebuild the exam routine when media files change"
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="seconds without changes before rebuilding (default: 2)")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="polling interval in seconds when inotify is unavailable (default: 1)")
+    parser.add_argument("--polling", action="store_true",
+                        help="always poll instead of using inotify")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Watch the build's input folders until interrupted
+    """
+    options = parse_args(argv)
+
+    # Paths are relative to the project folder, like process_exam_data.py's defaults
+    os.chdir(Path(__file__).parent)
+
+    try:
+        inputs = build_inputs(options)
+    except SchemaError as e:
+        print(f"❌ Invalid department schema: {e}")
+        return
+
+    folders = sorted({os.path.dirname(os.path.normpath(pattern)) or "." for pattern in inputs[0]})
+    folders = [folder for folder in folders if os.path.isdir(folder)]
+    if not folders:
+        print(f"❌ No input folder found for {', '.join(inputs[0])}")
+        return
+
+    watcher = create_watcher(folders, force_polling=options.polling, interval=options.interval)
+    kind = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+    print(f"👀 Watching {', '.join(folders)} ({kind}, {options.debounce}s debounce). Press Ctrl+C to stop.")
+
+    own_writes = {}
+    try:
+        while True:
+            changed = collect_changes(watcher, options.debounce)
+            if not rebuild(changed, options, inputs, own_writes):
+                continue
+            print("\n👀 Watching for changes...")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()